@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Micro-benchmark of the compiled route table of `opendc.util.path_parser` against the legacy implementation.
+
+Usage: python bench_path_parser.py --number 200
+"""
+import argparse
+import json
+import os
+import timeit
+
+from opendc.util import path_parser
+
+
+def legacy_parse(version, endpoint_path):
+    """The original implementation, which re-reads `paths.json` and scans all templates on every call."""
+    with open(os.path.join(os.path.dirname(path_parser.__file__), '..', 'api', '{}',
+                           'paths.json').format(version)) as paths_file:
+        paths = json.load(paths_file)
+
+    endpoint_path_parts = endpoint_path.strip('/').split('/')
+    paths_parts = [x.strip('/').split('/') for x in paths if len(x.strip('/').split('/')) == len(endpoint_path_parts)]
+    path = None
+
+    for path_parts in paths_parts:
+        found = True
+        for (endpoint_part, part) in zip(endpoint_path_parts, path_parts):
+            if not part.startswith('{') and endpoint_part != part:
+                found = False
+                break
+        if found:
+            path = path_parts
+
+    if path is None:
+        return None
+
+    parameters = {}
+
+    for (name, value) in zip(path, endpoint_path_parts):
+        if name.startswith('{'):
+            parameters[name.strip('{}')] = value
+
+    return '{}/{}'.format(version, '/'.join(path)), parameters
+
+
+ENDPOINT_PATHS = [
+    'users',
+    'users/1',
+    '/projects/',
+    'projects/1',
+    'projects/1/authorizations',
+    'projects/1/topologies',
+    'projects/1/portfolios',
+    'topologies/1',
+    'portfolios/1',
+    'portfolios/1/scenarios',
+    'scenarios/1',
+    'schedulers',
+    'traces',
+    'traces/1',
+    'prefabs',
+    'prefabs/1',
+    'prefabs/authorizations',
+    'unknown',
+    'projects/1/unknown',
+    'users/1/2/3/4',
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the API path parser.')
+    parser.add_argument('--number', type=int, default=200, help='number of passes over the endpoint paths')
+    args = parser.parse_args()
+
+    legacy = timeit.timeit(lambda: [legacy_parse('v2', p) for p in ENDPOINT_PATHS], number=args.number)
+    compiled = timeit.timeit(lambda: [path_parser.parse('v2', p) for p in ENDPOINT_PATHS], number=args.number)
+
+    calls = args.number * len(ENDPOINT_PATHS)
+    print(f'legacy: {legacy / calls * 1e6:.2f}us/call, compiled: {compiled / calls * 1e6:.2f}us/call, '
+          f'speedup: {legacy / compiled:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,7 @@ Configuration file for all unit tests.
 import pytest
 
 from main import FLASK_CORE_APP
+from opendc.models.authorization import AUTHORIZATIONS
 
 
 @pytest.fixture
@@ -13,3 +14,5 @@ def client():
 
     with FLASK_CORE_APP.test_client() as client:
         yield client
+
+    AUTHORIZATIONS.clear()
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""Compare the throughput of the Flask server (`main.py`) and the asyncio server (`main_async.py`).
+
+Both servers run on an in-memory mongomock database, which can be given an artificial round-trip latency to stand in
+for a remote mongod. A number of concurrent clients then repeatedly fetch a project, and the number of requests per
+second is reported for each server.
+
+Over HTTP, the servers are started in-process and the clients use persistent connections. Over SocketIO, each server
+is started in a subprocess as it is run in production (`SOCKET_IO_CORE.run` for the Flask server, which uses eventlet
+when it is installed), and each client is a SocketIO connection that sends a request and waits for its response.
+
+Usage: python load_test.py --clients 64 --duration 10 --latency 2
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import mongomock
+from bson.objectid import ObjectId
+
+os.environ.setdefault('OPENDC_FLASK_TESTING', 'True')
+os.environ.setdefault('OPENDC_FLASK_SECRET', 'Secret')
+
+# pylint: disable=wrong-import-position
+from opendc.util import server
+from opendc.util.database import DB
+
+
+class _SlowCollection:
+    """Collection that waits for the given round-trip latency before each operation."""
+    def __init__(self, collection, latency):
+        self._collection = collection
+        self._latency = latency
+
+    def __getattr__(self, name):
+        attribute = getattr(self._collection, name)
+        if not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            time.sleep(self._latency)
+            return attribute(*args, **kwargs)
+
+        return call
+
+
+class _SlowDatabase:
+    def __init__(self, database, latency):
+        self._database = database
+        self._latency = latency
+
+    def __getattr__(self, name):
+        return _SlowCollection(getattr(self._database, name), self._latency)
+
+
+def _seed_database(latency, project_id=None):
+    """Point the database at mongomock and insert a user with a project, returning the ID of the project."""
+    database = mongomock.MongoClient().opendc
+
+    project_id = ObjectId(project_id)
+    database.users.insert_one({
+        '_id': ObjectId(),
+        'googleId': 'test',
+        'email': 'test@opendc.org',
+        'givenName': 'Test',
+        'familyName': 'User',
+        'authorizations': [{
+            'projectId': project_id,
+            'authorizationLevel': 'OWN'
+        }]
+    })
+    database.projects.insert_one({
+        '_id': project_id,
+        'name': 'Load test',
+        'datetimeCreated': '2020-01-01T00:00:00',
+        'datetimeLastEdited': '2020-01-01T00:00:00',
+        'topologyIds': [],
+        'portfolioIds': []
+    })
+
+    DB.opendc_db = _SlowDatabase(database, latency) if latency > 0 else database
+    return project_id
+
+
+def _start_sync_server(port):
+    from werkzeug.serving import make_server, WSGIRequestHandler
+    from main import FLASK_CORE_APP
+
+    # Keep connections alive, like the async server does
+    WSGIRequestHandler.protocol_version = 'HTTP/1.1'
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    httpd = make_server('127.0.0.1', port, FLASK_CORE_APP, threaded=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd.shutdown
+
+
+def _start_async_server(port):
+    from aiohttp import web
+    from main_async import create_app
+
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(create_app(), access_log=None)
+
+    loop.run_until_complete(runner.setup())
+    loop.run_until_complete(web.TCPSite(runner, '127.0.0.1', port).start())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+    def stop():
+        asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+    return stop
+
+
+def _run_clients(port, path, clients, duration):
+    """Fetch the given path with concurrent clients for the given duration, returning the completed requests."""
+    counts = [0] * clients
+    errors = []
+    deadline = time.monotonic() + duration
+
+    def client(index):
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        try:
+            while time.monotonic() < deadline:
+                connection.request('GET', path, headers={'auth-token': 'test'})
+                response = connection.getresponse()
+                response.read()
+                if response.status != 200:
+                    errors.append(response.status)
+                    return
+                counts[index] += 1
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(e)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=client, args=(i, )) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        print(f'Warning: {len(errors)} clients failed, first error: {errors[0]}')
+
+    return sum(counts)
+
+
+def _serve(name, port):
+    """Run the given server in the foreground, as it is run in production."""
+    if name == 'sync':
+        from main import FLASK_CORE_APP, SOCKET_IO_CORE
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        SOCKET_IO_CORE.run(FLASK_CORE_APP, host='127.0.0.1', port=port, use_reloader=False, log_output=False)
+    else:
+        from aiohttp import web
+        from main_async import create_app
+        web.run_app(create_app(), host='127.0.0.1', port=port, print=None, access_log=None)
+
+
+def _start_server_process(name, port, project_id, latency):
+    process = subprocess.Popen([
+        sys.executable, __file__, '--serve', name, '--port', str(port), '--latency', str(latency), '--project-id',
+        str(project_id)
+    ])
+
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            break
+        except OSError:
+            if process.poll() is not None or time.monotonic() > deadline:
+                process.kill()
+                raise RuntimeError(f'The {name} server did not start')
+            time.sleep(0.1)
+
+    def stop():
+        process.terminate()
+        process.wait()
+
+    return stop
+
+
+async def _run_socketio_clients(port, project_id, clients, duration):
+    """Request the given project over concurrent SocketIO connections, returning the completed requests."""
+    import socketio
+
+    counts = [0] * clients
+    errors = []
+    deadline = time.monotonic() + duration
+
+    message = {
+        'id': 0,
+        'method': 'GET',
+        'path': 'v2/projects/{projectId}',
+        'parameters': {
+            'body': {},
+            'path': {
+                'projectId': str(project_id)
+            },
+            'query': {}
+        },
+        'token': 'test'
+    }
+
+    async def client(index):
+        sio = socketio.AsyncClient()
+        responses = asyncio.Queue()
+        sio.on('response', responses.put_nowait)
+
+        try:
+            await sio.connect(f'http://127.0.0.1:{port}')
+            while time.monotonic() < deadline:
+                await sio.emit('request', message)
+                response = await asyncio.wait_for(responses.get(), 30)
+                response = json.loads(response) if isinstance(response, str) else response
+                if response['status']['code'] != 200:
+                    errors.append(response['status']['code'])
+                    return
+                counts[index] += 1
+        except Exception as e:  # pylint: disable=broad-except
+            errors.append(e)
+        finally:
+            await sio.disconnect()
+
+    await asyncio.gather(*(client(i) for i in range(clients)))
+
+    if errors:
+        print(f'Warning: {len(errors)} clients failed, first error: {errors[0]!r}')
+
+    return sum(counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the throughput of the sync and async API servers.')
+    parser.add_argument('--clients', type=int, default=64, help='number of concurrent clients')
+    parser.add_argument('--duration', type=float, default=10, help='duration of each run in seconds')
+    parser.add_argument('--latency', type=float, default=2, help='simulated database round-trip time in ms')
+    parser.add_argument('--server', choices=['sync', 'async', 'both'], default='both', help='servers to test')
+    parser.add_argument('--transport',
+                        choices=['http', 'socketio', 'both'],
+                        default='both',
+                        help='transports to test')
+    parser.add_argument('--port', type=int, default=8091, help='first port to listen on')
+    parser.add_argument('--serve', choices=['sync', 'async'], help=argparse.SUPPRESS)
+    parser.add_argument('--project-id', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Logging each request would dominate the measurements
+    server.log_response = lambda transport, req, res: None
+
+    project_id = _seed_database(args.latency / 1000, args.project_id)
+    if args.serve is not None:
+        _serve(args.serve, args.port)
+        return
+
+    path = f'/v2/projects/{project_id}'
+
+    servers = [('sync', _start_sync_server), ('async', _start_async_server)]
+    for port, (name, start) in enumerate(servers, args.port):
+        if args.server not in (name, 'both'):
+            continue
+
+        if args.transport in ('http', 'both'):
+            stop = start(port)
+            try:
+                completed = _run_clients(port, path, args.clients, args.duration)
+            finally:
+                stop()
+
+            print(f'{name} (HTTP):\t{completed / args.duration:.1f} req/s ({completed} requests, '
+                  f'{args.clients} clients, {args.latency} ms latency)')
+
+        if args.transport in ('socketio', 'both'):
+            # Use a separate port, since the port of the in-process server may still be in TIME_WAIT
+            stop = _start_server_process(name, port + len(servers), project_id, args.latency)
+            try:
+                completed = asyncio.run(_run_socketio_clients(port + len(servers), project_id, args.clients,
+                                                              args.duration))
+            finally:
+                stop()
+
+            print(f'{name} (SocketIO):\t{completed / args.duration:.1f} req/s ({completed} requests, '
+                  f'{args.clients} clients, {args.latency} ms latency)')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,20 +1,14 @@
 #!/usr/bin/env python3
 import json
 import os
-import sys
-import traceback
-import urllib.request
 
 import flask_socketio
 from dotenv import load_dotenv
 from flask import Flask, request, jsonify
 from flask_compress import Compress
 from flask_cors import CORS
-from oauth2client import client, crypt
 
-from opendc.models.user import User
-from opendc.util import rest, path_parser, database
-from opendc.util.exceptions import AuthorizationTokenError, RequestInitializationError
+from opendc.util import database, server
 from opendc.util.json import JSONEncoder
 
 load_dotenv()
@@ -53,7 +47,10 @@ compress.init_app(FLASK_CORE_APP)
 
 SOCKET_IO_CORE = flask_socketio.SocketIO(FLASK_CORE_APP, cors_allowed_origins="*")
 
-API_VERSIONS = {'v2'}
+# Per-connection sessions of the SocketIO clients, keyed by session ID
+SOCKET_SESSIONS = {}
+
+server.register_api()
 
 
 @FLASK_CORE_APP.route('/tokensignin', methods=['POST'])
@@ -65,72 +62,32 @@ def sign_in():
     except KeyError:
         return 'No idtoken provided', 401
 
-    try:
-        idinfo = client.verify_id_token(token, os.environ['OPENDC_OAUTH_CLIENT_ID'])
-
-        if idinfo['aud'] != os.environ['OPENDC_OAUTH_CLIENT_ID']:
-            raise crypt.AppIdentityError('Unrecognized client.')
-
-        if idinfo['iss'] not in ['accounts.google.com', 'https://accounts.google.com']:
-            raise crypt.AppIdentityError('Wrong issuer.')
-    except ValueError:
-        url = "https://www.googleapis.com/oauth2/v3/tokeninfo?id_token={}".format(token)
-        req = urllib.request.Request(url)
-        response = urllib.request.urlopen(url=req, timeout=30)
-        res = response.read()
-        idinfo = json.loads(res)
-    except crypt.AppIdentityError as e:
+    data = server.sign_in(token)
+    if data is None:
         return 'Did not successfully authenticate'
 
-    user = User.from_google_id(idinfo['sub'])
-
-    data = {'isNewUser': user.obj is None}
+    return jsonify(**data)
 
-    if user.obj is not None:
-        data['userId'] = user.get_id()
 
-    return jsonify(**data)
+@FLASK_CORE_APP.route('/health', methods=['GET'])
+def health():
+    """Report the health of the server and of its database connection."""
+    (data, status) = server.health()
+    return jsonify(**data), status
 
 
 @FLASK_CORE_APP.route('/<string:version>/<path:endpoint_path>', methods=['GET', 'POST', 'PUT', 'DELETE'])
 def api_call(version, endpoint_path):
     """Call an API endpoint directly over HTTP."""
 
-    # Check whether given version is valid
-    if version not in API_VERSIONS:
-        return jsonify(error='API version not found'), 404
-
-    # Get path and parameters
-    (path, path_parameters) = path_parser.parse(version, endpoint_path)
-
-    query_parameters = request.args.to_dict()
-    for param in query_parameters:
-        try:
-            query_parameters[param] = int(query_parameters[param])
-        except:
-            pass
-
-    try:
-        body_parameters = json.loads(request.get_data())
-    except:
-        body_parameters = {}
+    (message, error) = server.http_message(version, endpoint_path, request.method, request.args.to_dict(),
+                                           request.get_data(), request.headers.get('auth-token'))
+    if message is None:
+        return jsonify(error=error), 404
 
     # Create and call request
-    (req, response) = _process_message({
-        'id': 0,
-        'method': request.method,
-        'parameters': {
-            'body': body_parameters,
-            'path': path_parameters,
-            'query': query_parameters
-        },
-        'path': path,
-        'token': request.headers.get('auth-token')
-    })
-
-    print(
-        f'HTTP:\t{req.method} to `/{req.path}` resulted in {response.status["code"]}: {response.status["description"]}')
-    sys.stdout.flush()
+    (req, response) = server.process_message(message)
+    server.log_response('HTTP:', req, response)
 
     flask_response = jsonify(json.loads(response.to_JSON()))
     flask_response.status_code = response.status['code']
@@ -140,47 +97,16 @@ def api_call(version, endpoint_path):
 @SOCKET_IO_CORE.on('request')
 def receive_message(message):
     """"Receive a SocketIO request"""
-    (req, res) = _process_message(message)
-
-    print(f'Socket: {req.method} to `/{req.path}` resulted in {res.status["code"]}: {res.status["description"]}')
-    sys.stdout.flush()
+    (req, res) = server.process_message(message, SOCKET_SESSIONS.setdefault(request.sid, {}))
+    server.log_response('Socket:', req, res)
 
     flask_socketio.emit('response', res.to_JSON(), json=True)
 
 
-def _process_message(message):
-    """Process a request message and return the response."""
-
-    try:
-        req = rest.Request(message)
-        res = req.process()
-
-        return req, res
-
-    except AuthorizationTokenError:
-        res = rest.Response(401, 'Authorization error')
-        res.id = message['id']
-
-    except RequestInitializationError as e:
-        res = rest.Response(400, str(e))
-        res.id = message['id']
-
-        if not 'method' in message:
-            message['method'] = 'UNSPECIFIED'
-        if not 'path' in message:
-            message['path'] = 'UNSPECIFIED'
-
-    except Exception:
-        res = rest.Response(500, 'Internal server error')
-        if 'id' in message:
-            res.id = message['id']
-        traceback.print_exc()
-
-    req = rest.Request()
-    req.method = message['method']
-    req.path = message['path']
-
-    return req, res
+@SOCKET_IO_CORE.on('disconnect')
+def disconnect():
+    """Forget the session of a disconnected SocketIO client."""
+    SOCKET_SESSIONS.pop(request.sid, None)
 
 
 if __name__ == '__main__':
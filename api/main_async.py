@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Asyncio entry point of the web server, as an alternative to the Flask server of `main.py`.
+
+Connections are handled by a single event loop, so many concurrent SocketIO clients can be served by one process.
+The endpoints and pymongo are synchronous, so requests are processed by a pool of worker threads, which bounds the
+number of requests waiting on the database at the same time instead of the number of open connections.
+"""
+import asyncio
+import functools
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import socketio
+from aiohttp import web
+from dotenv import load_dotenv
+
+from opendc.util import database, server
+from opendc.util.json import JSONEncoder
+
+load_dotenv()
+
+TEST_MODE = "OPENDC_FLASK_TESTING" in os.environ
+
+# Set up database if not testing
+if not TEST_MODE:
+    database.DB.initialize_database(
+        user=os.environ['OPENDC_DB_USERNAME'],
+        password=os.environ['OPENDC_DB_PASSWORD'],
+        database=os.environ['OPENDC_DB'],
+        host=os.environ.get('OPENDC_DB_HOST', 'localhost'))
+
+# Worker threads that run the (blocking) endpoint handlers
+EXECUTOR = ThreadPoolExecutor(max_workers=int(os.environ.get('OPENDC_ASYNC_WORKERS', 32)))
+
+SOCKET_IO_CORE = socketio.AsyncServer(async_mode='aiohttp', cors_allowed_origins='*')
+
+# Per-connection sessions of the SocketIO clients, keyed by session ID
+SOCKET_SESSIONS = {}
+
+server.register_api()
+
+_dumps = functools.partial(json.dumps, cls=JSONEncoder)
+
+_CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'auth-token, content-type',
+    'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE',
+}
+
+
+async def _run(func, *args):
+    """Run the given blocking function on the worker threads."""
+    return await asyncio.get_event_loop().run_in_executor(EXECUTOR, func, *args)
+
+
+async def sign_in(request):
+    """Authenticate a user with Google sign in"""
+
+    form = await request.post()
+    if 'idtoken' not in form:
+        return web.Response(text='No idtoken provided', status=401, headers=_CORS_HEADERS)
+
+    data = await _run(server.sign_in, form['idtoken'])
+    if data is None:
+        return web.Response(text='Did not successfully authenticate', headers=_CORS_HEADERS)
+
+    return web.json_response(data, dumps=_dumps, headers=_CORS_HEADERS)
+
+
+async def health(request):
+    """Report the health of the server and of its database connection."""
+    (data, status) = await _run(server.health)
+    return web.json_response(data, status=status, dumps=_dumps, headers=_CORS_HEADERS)
+
+
+async def api_call(request):
+    """Call an API endpoint directly over HTTP."""
+
+    if request.method == 'OPTIONS':
+        return web.Response(headers=_CORS_HEADERS)
+
+    (message, error) = server.http_message(request.match_info['version'], request.match_info['endpoint_path'],
+                                           request.method, request.query, await request.read(),
+                                           request.headers.get('auth-token'))
+    if message is None:
+        return web.json_response({'error': error}, status=404, headers=_CORS_HEADERS)
+
+    (req, response) = await _run(server.process_message, message)
+    server.log_response('HTTP:', req, response)
+
+    return web.Response(text=response.to_JSON(),
+                        status=response.status['code'],
+                        content_type='application/json',
+                        headers=_CORS_HEADERS)
+
+
+@SOCKET_IO_CORE.on('request')
+async def receive_message(sid, message):
+    """"Receive a SocketIO request"""
+    (req, res) = await _run(server.process_message, message, SOCKET_SESSIONS.setdefault(sid, {}))
+    server.log_response('Socket:', req, res)
+
+    await SOCKET_IO_CORE.emit('response', res.to_JSON(), room=sid)
+
+
+@SOCKET_IO_CORE.on('disconnect')
+async def disconnect(sid):
+    """Forget the session of a disconnected SocketIO client."""
+    SOCKET_SESSIONS.pop(sid, None)
+
+
+def create_app():
+    """Create the aiohttp application serving the API."""
+    app = web.Application()
+    SOCKET_IO_CORE.attach(app)
+
+    app.router.add_post('/tokensignin', sign_in)
+    app.router.add_get('/health', health)
+    app.router.add_route('*', '/{version}/{endpoint_path:.+}', api_call)
+
+    return app
+
+
+if __name__ == '__main__':
+    print("Web server started on 8081")
+    web.run_app(create_app(), host='0.0.0.0', port=8081)
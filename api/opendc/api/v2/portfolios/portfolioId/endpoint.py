@@ -1,3 +1,4 @@
+from opendc.models.model import projection
 from opendc.models.portfolio import Portfolio
 from opendc.models.project import Project
 from opendc.util.rest import Response
@@ -8,12 +9,13 @@ def GET(request):
 
     request.check_required_parameters(path={'portfolioId': 'string'})
 
-    portfolio = Portfolio.from_id(request.params_path['portfolioId'])
+    fields = request.get_fields()
+    portfolio = Portfolio.from_id(request.params_path['portfolioId'], projection(fields, 'projectId'))
 
     portfolio.check_exists()
     portfolio.check_user_access(request.google_id, False)
 
-    return Response(200, 'Successfully retrieved portfolio.', portfolio.obj)
+    return Response(200, 'Successfully retrieved portfolio.', portfolio.get_fields(fields))
 
 
 def PUT(request):
@@ -59,7 +61,7 @@ def DELETE(request):
     project = Project.from_id(portfolio.obj['projectId'])
     project.check_exists()
     if portfolio_id in project.obj['portfolioIds']:
-        project.obj['portfolioIds'].remove(portfolio_id)
+        project.pull_property('portfolioIds', portfolio_id)
     project.update()
 
     old_object = portfolio.delete()
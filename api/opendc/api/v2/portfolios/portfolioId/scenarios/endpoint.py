@@ -43,7 +43,7 @@ def POST(request):
 
     scenario.insert()
 
-    portfolio.obj['scenarioIds'].append(scenario.get_id())
+    portfolio.push_property('scenarioIds', scenario.get_id())
     portfolio.update()
 
     return Response(200, 'Successfully added Scenario.', scenario.obj)
@@ -1,5 +1,6 @@
 from datetime import datetime
 
+from opendc.models.authorization import AUTHORIZATIONS
 from opendc.models.project import Project
 from opendc.models.topology import Topology
 from opendc.models.user import User
@@ -25,8 +26,9 @@ def POST(request):
     topology.set_property('projectId', project.get_id())
     topology.update()
 
-    user = User.from_google_id(request.google_id)
-    user.obj['authorizations'].append({'projectId': project.get_id(), 'authorizationLevel': 'OWN'})
+    user = User.from_google_id(request.google_id, {'authorizations': True})
+    user.push_property('authorizations', {'projectId': project.get_id(), 'authorizationLevel': 'OWN'})
     user.update()
+    AUTHORIZATIONS.invalidate_after_flush(google_ids=[request.google_id])
 
     return Response(200, 'Successfully created project.', project.obj)
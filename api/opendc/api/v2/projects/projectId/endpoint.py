@@ -1,5 +1,7 @@
 from datetime import datetime
 
+from opendc.models.authorization import AUTHORIZATIONS
+from opendc.models.model import projection
 from opendc.models.portfolio import Portfolio
 from opendc.models.project import Project
 from opendc.models.topology import Topology
@@ -13,12 +15,13 @@ def GET(request):
 
     request.check_required_parameters(path={'projectId': 'string'})
 
-    project = Project.from_id(request.params_path['projectId'])
+    fields = request.get_fields()
+    project = Project.from_id(request.params_path['projectId'], projection(fields))
 
     project.check_exists()
     project.check_user_access(request.google_id, False)
 
-    return Response(200, 'Successfully retrieved project', project.obj)
+    return Response(200, 'Successfully retrieved project', project.get_fields(fields))
 
 
 def PUT(request):
@@ -48,19 +51,15 @@ def DELETE(request):
     project.check_exists()
     project.check_user_access(request.google_id, True)
 
-    for topology_id in project.obj['topologyIds']:
-        topology = Topology.from_id(topology_id)
-        topology.delete()
-
-    for portfolio_id in project.obj['portfolioIds']:
-        portfolio = Portfolio.from_id(portfolio_id)
-        portfolio.delete()
+    Topology.delete_ids(project.obj['topologyIds'])
+    Portfolio.delete_ids(project.obj['portfolioIds'])
 
-    user = User.from_google_id(request.google_id)
-    user.obj['authorizations'] = list(
-        filter(lambda x: x['projectId'] != project.get_id(), user.obj['authorizations']))
+    user = User.from_google_id(request.google_id, {'authorizations': True})
+    user.set_property('authorizations',
+                      list(filter(lambda x: x['projectId'] != project.get_id(), user.obj['authorizations'])))
     user.update()
 
     old_object = project.delete()
+    AUTHORIZATIONS.invalidate_after_flush(project_ids=[project.get_id()])
 
     return Response(200, 'Successfully deleted project.', old_object)
@@ -29,7 +29,7 @@ def POST(request):
 
     portfolio.insert()
 
-    project.obj['portfolioIds'].append(portfolio.get_id())
+    project.push_property('portfolioIds', portfolio.get_id())
     project.update()
 
     return Response(200, 'Successfully added Portfolio.', portfolio.obj)
@@ -24,7 +24,7 @@ def POST(request):
 
     topology.insert()
 
-    project.obj['topologyIds'].append(topology.get_id())
+    project.push_property('topologyIds', topology.get_id())
     project.set_property('datetimeLastEdited', Database.datetime_to_string(datetime.now()))
     project.update()
 
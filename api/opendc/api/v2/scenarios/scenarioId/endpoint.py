@@ -1,3 +1,4 @@
+from opendc.models.model import projection
 from opendc.models.scenario import Scenario
 from opendc.models.portfolio import Portfolio
 from opendc.util.rest import Response
@@ -8,12 +9,13 @@ def GET(request):
 
     request.check_required_parameters(path={'scenarioId': 'string'})
 
-    scenario = Scenario.from_id(request.params_path['scenarioId'])
+    fields = request.get_fields()
+    scenario = Scenario.from_id(request.params_path['scenarioId'], projection(fields, 'portfolioId'))
 
     scenario.check_exists()
     scenario.check_user_access(request.google_id, False)
 
-    return Response(200, 'Successfully retrieved scenario.', scenario.obj)
+    return Response(200, 'Successfully retrieved scenario.', scenario.get_fields(fields))
 
 
 def PUT(request):
@@ -51,7 +53,7 @@ def DELETE(request):
     portfolio = Portfolio.from_id(scenario.obj['portfolioId'])
     portfolio.check_exists()
     if scenario_id in portfolio.obj['scenarioIds']:
-        portfolio.obj['scenarioIds'].remove(scenario_id)
+        portfolio.pull_property('scenarioIds', scenario_id)
     portfolio.update()
 
     old_object = scenario.delete()
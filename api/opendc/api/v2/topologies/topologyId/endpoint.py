@@ -1,6 +1,7 @@
 from datetime import datetime
 
 from opendc.util.database import Database
+from opendc.models.model import projection
 from opendc.models.project import Project
 from opendc.models.topology import Topology
 from opendc.util.rest import Response
@@ -11,12 +12,13 @@ def GET(request):
 
     request.check_required_parameters(path={'topologyId': 'string'})
 
-    topology = Topology.from_id(request.params_path['topologyId'])
+    fields = request.get_fields()
+    topology = Topology.from_id(request.params_path['topologyId'], projection(fields, 'projectId'))
 
     topology.check_exists()
     topology.check_user_access(request.google_id, False)
 
-    return Response(200, 'Successfully retrieved topology.', topology.obj)
+    return Response(200, 'Successfully retrieved topology.', topology.get_fields(fields))
 
 
 def PUT(request):
@@ -50,7 +52,7 @@ def DELETE(request):
     project = Project.from_id(topology.obj['projectId'])
     project.check_exists()
     if topology_id in project.obj['topologyIds']:
-        project.obj['topologyIds'].remove(topology_id)
+        project.pull_property('topologyIds', topology_id)
     project.update()
 
     old_object = topology.delete()
@@ -19,6 +19,25 @@ def test_get_topology(client, mocker):
     assert '200' in res.status
 
 
+def test_get_topology_fields(client, mocker):
+    fetch_one = mocker.patch.object(DB,
+                                    'fetch_one',
+                                    return_value={
+                                        '_id': test_id,
+                                        'projectId': test_id,
+                                        'name': 'test',
+                                        'authorizations': [{
+                                            'projectId': test_id,
+                                            'authorizationLevel': 'EDIT'
+                                        }]
+                                    })
+    res = client.get(f'/v2/topologies/{test_id}?fields=name')
+    assert '200' in res.status
+    assert res.json['content'] == {'_id': test_id, 'name': 'test'}
+    assert fetch_one.call_args_list[0][0][2] == {'name': True, 'projectId': True}
+    assert fetch_one.call_args_list[1][0][2] == {'authorizations': True}
+
+
 def test_get_topology_non_existing(client, mocker):
     mocker.patch.object(DB, 'fetch_one', return_value=None)
     assert '404' in client.get('/v2/topologies/1').status
@@ -1,10 +1,11 @@
+from opendc.models.model import projection
 from opendc.models.trace import Trace
 from opendc.util.rest import Response
 
 
-def GET(_):
+def GET(request):
     """Get all available Traces."""
 
-    traces = Trace.get_all()
+    traces = Trace.get_all(projection(request.get_fields()))
 
     return Response(200, 'Successfully retrieved Traces', traces.obj)
@@ -1,3 +1,4 @@
+from opendc.models.model import projection
 from opendc.models.trace import Trace
 from opendc.util.rest import Response
 
@@ -7,8 +8,9 @@ def GET(request):
 
     request.check_required_parameters(path={'traceId': 'string'})
 
-    trace = Trace.from_id(request.params_path['traceId'])
+    fields = request.get_fields()
+    trace = Trace.from_id(request.params_path['traceId'], projection(fields))
 
     trace.check_exists()
 
-    return Response(200, 'Successfully retrieved trace.', trace.obj)
+    return Response(200, 'Successfully retrieved trace.', trace.get_fields(fields))
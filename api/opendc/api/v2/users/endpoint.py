@@ -1,3 +1,4 @@
+from opendc.models.authorization import AUTHORIZATIONS
 from opendc.models.user import User
 from opendc.util.rest import Response
 
@@ -26,5 +27,6 @@ def POST(request):
     user.check_already_exists()
 
     user.insert()
+    AUTHORIZATIONS.invalidate_after_flush(google_ids=[request.google_id])
 
     return Response(200, 'Successfully created user.', user.obj)
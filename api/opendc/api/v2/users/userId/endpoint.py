@@ -1,3 +1,5 @@
+from opendc.models.authorization import AUTHORIZATIONS
+from opendc.models.model import projection
 from opendc.models.project import Project
 from opendc.models.user import User
 from opendc.util.rest import Response
@@ -8,11 +10,12 @@ def GET(request):
 
     request.check_required_parameters(path={'userId': 'string'})
 
-    user = User.from_id(request.params_path['userId'])
+    fields = request.get_fields()
+    user = User.from_id(request.params_path['userId'], projection(fields))
 
     user.check_exists()
 
-    return Response(200, 'Successfully retrieved user.', user.obj)
+    return Response(200, 'Successfully retrieved user.', user.get_fields(fields))
 
 
 def PUT(request):
@@ -47,13 +50,13 @@ def DELETE(request):
     user.check_exists()
     user.check_correct_user(request.google_id)
 
-    for authorization in user.obj['authorizations']:
-        if authorization['authorizationLevel'] != 'OWN':
-            continue
-
-        project = Project.from_id(authorization['projectId'])
-        project.delete()
+    owned_project_ids = [
+        authorization['projectId'] for authorization in user.obj['authorizations']
+        if authorization['authorizationLevel'] == 'OWN'
+    ]
+    Project.delete_ids(owned_project_ids)
 
     old_object = user.delete()
+    AUTHORIZATIONS.invalidate_after_flush(google_ids=[old_object['googleId']], project_ids=owned_project_ids)
 
     return Response(200, 'Successfully deleted user.', old_object)
@@ -0,0 +1,113 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from opendc.models.model import after_flush
+from opendc.models.user import User
+
+
+class AuthorizationIndex:
+    """In-process index from (Google ID, project ID) to the authorization level of the user on that project.
+
+    The authorizations of a user are loaded lazily from the user document on first access. Endpoints that change
+    authorizations must invalidate the affected entries once their writes are in the database (see
+    `invalidate_after_flush`). Levels whose load overlapped an invalidation are returned but not cached, so that a
+    concurrent request cannot cache the levels from before the write.
+
+    Invalidations only reach the index of the current process: other server processes keep serving their cached
+    levels until these expire. The TTL of the entries (`OPENDC_AUTHORIZATION_TTL` seconds, 10 by default) therefore
+    bounds how long a revoked authorization remains usable on another process.
+    """
+    def __init__(self, max_users=10000, ttl=10):
+        self.max_users = max_users
+        self.ttl = ttl
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Increased by every invalidation. An invalidation of a project may concern any user, so a single counter is
+        # kept for all users
+        self._generation = 0
+
+    def get_levels(self, google_id):
+        """Returns the authorization levels of the given user, keyed by the string representation of project IDs.
+
+        The returned dict is shared and must not be modified.
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(google_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(google_id)
+                return entry[1]
+            generation = self._generation
+
+        levels = self._load(google_id)
+
+        with self._lock:
+            if generation != self._generation:
+                return levels
+
+            self._entries[google_id] = (now + self.ttl, levels)
+            self._entries.move_to_end(google_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+
+        return levels
+
+    def get_level(self, google_id, project_id):
+        """Returns the authorization level of the given user on the given project, or None if there is none.
+
+        A missing project ID (None) has no authorization level.
+        """
+        if project_id is None:
+            return None
+        return self.get_levels(google_id).get(str(project_id))
+
+    @staticmethod
+    def _load(google_id):
+        user = User.from_google_id(google_id, {'authorizations': True})
+        levels = {}
+
+        if user.obj is not None:
+            for authorization in user.obj['authorizations']:
+                levels.setdefault(str(authorization['projectId']), authorization['authorizationLevel'])
+
+        return levels
+
+    def invalidate(self, google_id):
+        """Forgets the authorizations of the given user."""
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(google_id, None)
+
+    def invalidate_project(self, project_id):
+        """Forgets all authorizations on the given project."""
+        project_id = str(project_id)
+
+        with self._lock:
+            self._generation += 1
+            for google_id in [k for k, (_, levels) in self._entries.items() if project_id in levels]:
+                del self._entries[google_id]
+
+    def invalidate_after_flush(self, google_ids=(), project_ids=()):
+        """Forgets the authorizations of the given users and on the given projects once the writes of the current
+        request are in the database."""
+        def invalidate():
+            for google_id in google_ids:
+                self.invalidate(google_id)
+            for project_id in project_ids:
+                self.invalidate_project(project_id)
+
+        after_flush(invalidate)
+
+    def clear(self):
+        """Forgets all authorizations."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+AUTHORIZATIONS = AuthorizationIndex(ttl=float(os.environ.get('OPENDC_AUTHORIZATION_TTL', 10)))
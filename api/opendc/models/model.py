@@ -1,9 +1,181 @@
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
 from bson.objectid import ObjectId
 
 from opendc.util.database import DB
 from opendc.util.exceptions import ClientError
 from opendc.util.rest import Response
 
+# The unit of work of the request that is being processed by the current thread (or greenlet)
+_SCOPE = threading.local()
+
+
+class UnitOfWork:
+    """Identity map and pending updates of a single request.
+
+    Each document is fetched at most once per unit of work: loading the same document again returns the enclosed
+    object that was loaded before. Writes are queued in a batch until the unit of work is flushed, after which the
+    registered post-flush callbacks are run.
+    """
+    def __init__(self):
+        self.documents = {}
+        self.partial = {}
+        self.queries = {}
+        self.batch = DB.batch()
+        self.callbacks = []
+
+    def fetch_one(self, query, collection, projection=None):
+        """Returns the document matching the given query, fetching it from the database only on first access.
+
+        Documents loaded with a projection are completed in place when more fields are requested later on.
+        """
+        if list(query) == ['_id']:
+            key = (collection, query['_id'])
+            if key in self.documents and self._covers(key, projection):
+                return self.documents[key]
+
+            obj = _fetch_one(query, collection, projection)
+            return None if obj is None else self.register(obj, collection, query['_id'], projection)
+
+        key = _query_key(query, collection, projection)
+        if key is None:
+            return _fetch_one(query, collection, projection)
+
+        if key in self.queries:
+            return self.queries[key]
+
+        obj = _fetch_one(query, collection, projection)
+        if obj is not None:
+            obj = self.register(obj, collection, projection=projection)
+
+        self.queries[key] = obj
+        return obj
+
+    def _covers(self, key, projection):
+        """Returns whether the mapped document contains all fields of the given projection."""
+        obj = self.documents[key]
+        if obj is None or (key[0], obj.get('_id')) not in self.partial:
+            return True
+
+        return projection is not None and set(projection) <= self.partial[(key[0], obj['_id'])]
+
+    def register(self, obj, collection, _id=None, projection=None):
+        """Adds a loaded or inserted document to the identity map and returns the mapped object.
+
+        The given ID is registered as an alias of the document, when it differs from the ID of the document.
+        """
+        if '_id' in obj:
+            key = (collection, obj['_id'])
+            mapped = self.documents.get(key)
+
+            if mapped is None:
+                self.documents[key] = obj
+                if projection is not None:
+                    self.partial[key] = set(projection)
+            elif key in self.partial:
+                # Only fill in the missing fields, so that changes made to the loaded fields are kept
+                for field, value in obj.items():
+                    mapped.setdefault(field, value)
+                if projection is None:
+                    del self.partial[key]
+                else:
+                    self.partial[key] |= set(projection)
+                obj = mapped
+            else:
+                obj = mapped
+
+        if _id is not None:
+            self.documents[(collection, _id)] = obj
+
+        return obj
+
+    def forget_queries(self, collection):
+        """Forgets the results of the queries on the given collection, except for the lookups by ID."""
+        self.queries = {key: obj for key, obj in self.queries.items() if key[0] != collection}
+
+    def forget(self, _id, collection):
+        """Marks a deleted document as missing in the identity map."""
+        obj = self.documents.get((collection, _id))
+        if obj is not None:
+            for key, value in list(self.documents.items()):
+                if value is obj:
+                    self.documents[key] = None
+
+        self.documents[(collection, _id)] = None
+        self.forget_queries(collection)
+
+    def after_flush(self, callback):
+        """Registers a callback to run once the queued operations have been written to the database."""
+        self.callbacks.append(callback)
+
+    def flush(self):
+        """Writes all queued operations to the database, and then runs the post-flush callbacks."""
+        self.batch.flush()
+
+        callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback()
+
+
+def _query_key(query, collection, projection=None):
+    """Returns a hashable key for a query matching fields by equality, or None if the query cannot be cached."""
+    try:
+        key = tuple(sorted(query.items()))
+        hash(key)
+    except TypeError:
+        return None
+
+    return collection, key, None if projection is None else tuple(sorted(projection))
+
+
+def _fetch_one(query, collection, projection):
+    if projection is None:
+        return DB.fetch_one(query, collection)
+    return DB.fetch_one(query, collection, projection)
+
+
+def projection(fields, *required):
+    """Returns the projection of the given requested fields and the fields required to handle the request.
+
+    Returns None when no fields were requested, meaning that the full document is needed.
+    """
+    if fields is None:
+        return None
+
+    return {field: True for field in list(fields) + list(required)}
+
+
+def after_flush(callback):
+    """Runs the given callback once the writes of the current request are in the database.
+
+    Without a unit of work, writes are not queued, so the callback is run immediately.
+    """
+    work = current_unit_of_work()
+    if work is None:
+        callback()
+    else:
+        work.after_flush(callback)
+
+
+def current_unit_of_work():
+    """Returns the unit of work of the current request, or None if there is none."""
+    return getattr(_SCOPE, 'unit_of_work', None)
+
+
+@contextmanager
+def unit_of_work():
+    """Starts a request-scoped unit of work, flushing its queued writes when the scope exits normally."""
+    previous = current_unit_of_work()
+    _SCOPE.unit_of_work = UnitOfWork()
+
+    try:
+        yield _SCOPE.unit_of_work
+        _SCOPE.unit_of_work.flush()
+    finally:
+        _SCOPE.unit_of_work = previous
+
 
 class Model:
     """Base class for all models."""
@@ -11,22 +183,34 @@ class Model:
     collection_name = '<specified in subclasses>'
 
     @classmethod
-    def from_id(cls, _id):
-        """Fetches the document with given ID from the collection."""
+    def from_id(cls, _id, projection=None):
+        """Fetches the document with given ID from the collection, optionally limited to the projected fields."""
         if isinstance(_id, str) and len(_id) == 24:
             _id = ObjectId(_id)
         elif not isinstance(_id, ObjectId):
             return cls(None)
 
-        return cls(DB.fetch_one({'_id': _id}, cls.collection_name))
+        return cls(cls._fetch_one({'_id': _id}, projection))
+
+    @classmethod
+    def get_all(cls, projection=None):
+        """Fetches all documents from the collection, optionally limited to the projected fields."""
+        if projection is None:
+            return cls(DB.fetch_all({}, cls.collection_name))
+        return cls(DB.fetch_all({}, cls.collection_name, projection))
 
     @classmethod
-    def get_all(cls):
-        """Fetches all documents from the collection."""
-        return cls(DB.fetch_all({}, cls.collection_name))
+    def _fetch_one(cls, query, projection=None):
+        """Fetches the first document matching the given query, at most once per request."""
+        work = current_unit_of_work()
+        if work is None:
+            return _fetch_one(query, cls.collection_name, projection)
+
+        return work.fetch_one(query, cls.collection_name, projection)
 
     def __init__(self, obj):
         self.obj = obj
+        self.changes = OrderedDict()
 
     def get_id(self):
         """Returns the ID of the enclosed object."""
@@ -37,6 +221,22 @@ class Model:
         if self.obj is None:
             raise ClientError(Response(404, 'Not found.'))
 
+    def get_fields(self, fields):
+        """Returns the given top-level fields of the enclosed object (and its ID), or the whole object if fields is
+        None."""
+        if fields is None or self.obj is None:
+            return self.obj
+
+        names = {'_id'} | {field.split('.')[0] for field in fields}
+        return {key: value for key, value in self.obj.items() if key in names}
+
+    def get_property(self, key):
+        """Returns the given property of the enclosed object, with support for simple nested access."""
+        value = self.obj
+        for part in key.split('.'):
+            value = value[part]
+        return value
+
     def set_property(self, key, value):
         """Sets the given property on the enclosed object, with support for simple nested access."""
         if '.' in key:
@@ -45,20 +245,117 @@ class Model:
         else:
             self.obj[key] = value
 
+        self.changes[key] = ('$set', None)
+
+    def push_property(self, key, value):
+        """Appends the given value to the list property of the enclosed object."""
+        self.get_property(key).append(value)
+        self._record_change(key, '$push', value)
+
+    def pull_property(self, key, value):
+        """Removes all occurrences of the given value from the list property of the enclosed object."""
+        values = self.get_property(key)
+        values[:] = [x for x in values if x != value]
+        self._record_change(key, '$pull', value)
+
+    def _record_change(self, key, operator, value):
+        """Records a `$push` or `$pull` of the given value, falling back to `$set` when the operations conflict."""
+        change = self.changes.get(key)
+
+        if change is None:
+            self.changes[key] = (operator, [value])
+        elif change[0] == operator:
+            change[1].append(value)
+        else:
+            self.changes[key] = ('$set', None)
+
+    def pending_update(self):
+        """Returns the update operators for the changes to the enclosed object since it was last written."""
+        paths = list(self.changes)
+        update = {}
+
+        for key, (operator, values) in self.changes.items():
+            # Parents of other changed paths are written in full, which covers the changes nested in them
+            if any(key.startswith(path + '.') for path in paths):
+                continue
+            if any(path.startswith(key + '.') for path in paths):
+                operator = '$set'
+
+            if operator == '$set':
+                update.setdefault('$set', {})[key] = self.get_property(key)
+            elif operator == '$push':
+                update.setdefault('$push', {})[key] = {'$each': values}
+            else:
+                update.setdefault('$pull', {})[key] = {'$in': values}
+
+        return update
+
+    @classmethod
+    def delete_ids(cls, ids):
+        """Deletes the documents with the given IDs from the collection, using a single `$in` query."""
+        ids = list(ids)
+        if not ids:
+            return
+
+        work = current_unit_of_work()
+        if work is None:
+            DB.delete_all({'_id': {'$in': ids}}, cls.collection_name)
+            return
+
+        for _id in ids:
+            work.forget(_id, cls.collection_name)
+            work.batch.delete(_id, cls.collection_name)
+
     def insert(self):
-        """Inserts the enclosed object and generates a UUID for it."""
+        """Inserts the enclosed object and generates a UUID for it.
+
+        Within a request, the insertion is queued until the end of the request.
+        """
         self.obj['_id'] = ObjectId()
-        DB.insert(self.obj, self.collection_name)
+        self.changes.clear()
+
+        work = current_unit_of_work()
+        if work is None:
+            DB.insert(self.obj, self.collection_name)
+            return
+
+        work.forget_queries(self.collection_name)
+        work.register(self.obj, self.collection_name)
+        work.batch.insert(self.obj, self.collection_name)
 
     def update(self):
-        """Updates the enclosed object and updates the internal reference to the newly inserted object."""
-        DB.update(self.get_id(), self.obj, self.collection_name)
+        """Updates the enclosed object and updates the internal reference to the newly inserted object.
+
+        Only the changed properties are sent. Within a request, the update is queued until the end of the request.
+        """
+        update = self.pending_update()
+        self.changes.clear()
+
+        if not update:
+            return
+
+        work = current_unit_of_work()
+        if work is None:
+            DB.update(self.get_id(), update, self.collection_name)
+            return
+
+        work.batch.update(self.get_id(), update, self.collection_name)
 
     def delete(self):
-        """Deletes the enclosed object in the database, if it existed."""
+        """Deletes the enclosed object in the database, if it existed.
+
+        Within a request, the deletion is queued until the end of the request.
+        """
         if self.obj is None:
             return None
 
         old_object = self.obj.copy()
-        DB.delete_one({'_id': self.get_id()}, self.collection_name)
+
+        work = current_unit_of_work()
+        if work is None:
+            DB.delete_one({'_id': self.get_id()}, self.collection_name)
+            return old_object
+
+        work.forget(self.get_id(), self.collection_name)
+        work.batch.delete(self.get_id(), self.collection_name)
         return old_object
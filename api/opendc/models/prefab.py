@@ -14,7 +14,7 @@ class Prefab(Model):
 
         :param google_id: The Google ID of the user.
         """
-        user = User.from_google_id(google_id)
+        user = User.from_google_id(google_id, {'_id': True})
 
         # TODO(Jacob) add special handling for OpenDC-provided prefabs
 
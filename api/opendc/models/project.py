@@ -1,3 +1,4 @@
+from opendc.models.authorization import AUTHORIZATIONS
 from opendc.models.model import Model
 from opendc.models.user import User
 from opendc.util.database import DB
@@ -16,10 +17,8 @@ class Project(Model):
         :param google_id: The Google ID of the user.
         :param edit_access: True when edit access should be checked, otherwise view access.
         """
-        user = User.from_google_id(google_id)
-        authorizations = list(filter(lambda x: str(x['projectId']) == str(self.get_id()),
-                                     user.obj['authorizations']))
-        if len(authorizations) == 0 or (edit_access and authorizations[0]['authorizationLevel'] == 'VIEW'):
+        level = AUTHORIZATIONS.get_level(google_id, self.obj.get('_id'))
+        if not level or (edit_access and level == 'VIEW'):
             raise ClientError(Response(403, "Forbidden from retrieving project."))
 
     def get_all_authorizations(self):
@@ -1,6 +1,6 @@
+from opendc.models.authorization import AUTHORIZATIONS
 from opendc.models.model import Model
 from opendc.models.portfolio import Portfolio
-from opendc.models.user import User
 from opendc.util.exceptions import ClientError
 from opendc.util.rest import Response
 
@@ -18,9 +18,8 @@ class Scenario(Model):
         :param google_id: The Google ID of the user.
         :param edit_access: True when edit access should be checked, otherwise view access.
         """
-        portfolio = Portfolio.from_id(self.obj['portfolioId'])
-        user = User.from_google_id(google_id)
-        authorizations = list(
-            filter(lambda x: str(x['projectId']) == str(portfolio.obj['projectId']), user.obj['authorizations']))
-        if len(authorizations) == 0 or (edit_access and authorizations[0]['authorizationLevel'] == 'VIEW'):
+        portfolio = Portfolio.from_id(self.obj['portfolioId'], {'projectId': True})
+        # A scenario whose portfolio does not exist belongs to no project the user can access
+        level = AUTHORIZATIONS.get_level(google_id, (portfolio.obj or {}).get('projectId'))
+        if not level or (edit_access and level == 'VIEW'):
             raise ClientError(Response(403, 'Forbidden from retrieving/editing scenario.'))
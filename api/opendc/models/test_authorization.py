@@ -0,0 +1,136 @@
+from bson.objectid import ObjectId
+
+from opendc.models.authorization import AuthorizationIndex
+from opendc.models.model import unit_of_work
+from opendc.util.database import DB
+
+project_id = ObjectId()
+project_id_2 = ObjectId()
+
+
+def _mock_user(mocker):
+    return mocker.patch.object(DB,
+                               'fetch_one',
+                               return_value={
+                                   '_id': ObjectId(),
+                                   'googleId': 'test',
+                                   'authorizations': [{
+                                       'projectId': project_id,
+                                       'authorizationLevel': 'EDIT'
+                                   }, {
+                                       'projectId': project_id_2,
+                                       'authorizationLevel': 'VIEW'
+                                   }]
+                               })
+
+
+def test_levels_are_loaded_once(mocker):
+    fetch_one = _mock_user(mocker)
+    index = AuthorizationIndex()
+
+    assert index.get_level('test', project_id) == 'EDIT'
+    assert index.get_level('test', str(project_id_2)) == 'VIEW'
+    assert index.get_level('test', ObjectId()) is None
+
+    fetch_one.assert_called_once()
+
+
+def test_unknown_user(mocker):
+    mocker.patch.object(DB, 'fetch_one', return_value=None)
+    assert AuthorizationIndex().get_level('unknown', project_id) is None
+
+
+def test_invalidate(mocker):
+    fetch_one = _mock_user(mocker)
+    index = AuthorizationIndex()
+
+    index.get_level('test', project_id)
+    index.invalidate('test')
+    index.get_level('test', project_id)
+
+    assert fetch_one.call_count == 2
+
+
+def test_invalidate_project(mocker):
+    fetch_one = _mock_user(mocker)
+    index = AuthorizationIndex()
+
+    index.get_level('test', project_id)
+    index.invalidate_project(ObjectId())
+    index.get_level('test', project_id)
+    assert fetch_one.call_count == 1
+
+    index.invalidate_project(project_id)
+    index.get_level('test', project_id)
+    assert fetch_one.call_count == 2
+
+
+def test_invalidate_after_flush(mocker):
+    fetch_one = _mock_user(mocker)
+    index = AuthorizationIndex()
+    index.get_level('test', project_id)
+
+    with unit_of_work():
+        index.invalidate_after_flush(google_ids=['test'])
+
+        # A concurrent request still sees the cached levels until the write is flushed
+        index.get_level('test', project_id)
+        assert fetch_one.call_count == 1
+
+    index.get_level('test', project_id)
+    assert fetch_one.call_count == 2
+
+
+def test_invalidate_during_load(mocker):
+    index = AuthorizationIndex()
+    fetch_one = _mock_user(mocker)
+
+    def load_and_invalidate(*args, **kwargs):
+        # The user is written and invalidated by another request while the levels are loaded
+        index.invalidate('test')
+        return {'_id': ObjectId(), 'googleId': 'test', 'authorizations': []}
+
+    fetch_one.side_effect = load_and_invalidate
+    assert index.get_level('test', project_id) is None
+
+    fetch_one.side_effect = None
+    assert index.get_level('test', project_id) == 'EDIT'
+    assert fetch_one.call_count == 2
+
+
+def test_expiry(mocker):
+    fetch_one = _mock_user(mocker)
+    index = AuthorizationIndex(ttl=0)
+
+    index.get_level('test', project_id)
+    index.get_level('test', project_id)
+
+    assert fetch_one.call_count == 2
+
+
+def test_bounded(mocker):
+    fetch_one = _mock_user(mocker)
+    index = AuthorizationIndex(max_users=1)
+
+    index.get_level('a', project_id)
+    index.get_level('b', project_id)
+    index.get_level('a', project_id)
+
+    assert fetch_one.call_count == 3
+
+
+def test_create_project_invalidates(client, mocker):
+    user = {'_id': ObjectId(), 'googleId': 'test', 'authorizations': []}
+    fetch_one = mocker.patch.object(DB,
+                                    'fetch_one',
+                                    side_effect=lambda query, collection, projection=None: user
+                                    if collection == 'users' else dict(query))
+    mocker.patch.object(DB, 'insert', return_value=None)
+    mocker.patch.object(DB, 'update', return_value=None)
+
+    project = client.post('/v2/projects', json={'project': {'name': 'test'}}).get_json()['content']
+    assert '200' in client.get(f'/v2/projects/{project["_id"]}').status
+    assert fetch_one.call_count == 3
+
+    assert '200' in client.get(f'/v2/projects/{project["_id"]}').status
+    assert fetch_one.call_count == 4
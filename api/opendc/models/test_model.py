@@ -0,0 +1,291 @@
+from bson import BSON
+from bson.objectid import ObjectId
+
+from opendc.models.model import after_flush, unit_of_work
+from opendc.models.portfolio import Portfolio
+from opendc.models.topology import Topology
+from opendc.models.user import User
+from opendc.util.database import DB
+
+project_id = ObjectId()
+portfolio_id = ObjectId()
+scenario_id = ObjectId()
+topology_id = ObjectId()
+
+DOCUMENTS = {
+    'users': [{
+        '_id': ObjectId(),
+        'googleId': 'test',
+        'authorizations': [{
+            'projectId': project_id,
+            'authorizationLevel': 'OWN'
+        }]
+    }],
+    'portfolios': [{
+        '_id': portfolio_id,
+        'projectId': project_id,
+        'scenarioIds': [scenario_id],
+    }],
+    'scenarios': [{
+        '_id': scenario_id,
+        'portfolioId': portfolio_id,
+        'name': 'Scenario',
+    }],
+    'projects': [{
+        '_id': project_id,
+        'topologyIds': [ObjectId() for _ in range(10)] + [topology_id],
+        'portfolioIds': [ObjectId() for _ in range(10)] + [portfolio_id],
+    }],
+    'topologies': [{
+        '_id': topology_id,
+        'projectId': project_id,
+        'name': 'Topology',
+        'rooms': [],
+    }],
+}
+
+
+def _mock_database(mocker):
+    def fetch_one(query, collection, projection=None):
+        for document in DOCUMENTS[collection]:
+            if all(document.get(key) == value for key, value in query.items()):
+                if projection is None:
+                    return dict(document)
+                return {key: value for key, value in document.items() if key == '_id' or key in projection}
+        return None
+
+    return {
+        'fetch_one': mocker.patch.object(DB, 'fetch_one', side_effect=fetch_one),
+        'update': mocker.patch.object(DB, 'update', return_value=None),
+        'insert': mocker.patch.object(DB, 'insert', return_value=None),
+        'delete_one': mocker.patch.object(DB, 'delete_one', return_value=None),
+        'delete_all': mocker.patch.object(DB, 'delete_all', return_value=None),
+        'bulk_write': mocker.patch.object(DB, 'bulk_write', return_value=None),
+    }
+
+
+def test_identity_map(mocker):
+    db = _mock_database(mocker)
+
+    with unit_of_work():
+        first = Portfolio.from_id(str(portfolio_id))
+        second = Portfolio.from_id(portfolio_id)
+        assert first.obj is second.obj
+
+        assert User.from_google_id('test').obj is User.from_google_id('test').obj
+        assert User.from_google_id('other').obj is None
+        assert User.from_google_id('other').obj is None
+
+    assert db['fetch_one'].call_count == 3
+
+
+def test_identity_map_completes_projections(mocker):
+    db = _mock_database(mocker)
+
+    with unit_of_work():
+        partial = Portfolio.from_id(portfolio_id, {'projectId': True})
+        assert partial.obj == {'_id': portfolio_id, 'projectId': project_id}
+        assert Portfolio.from_id(portfolio_id, {'projectId': True}).obj is partial.obj
+        assert db['fetch_one'].call_count == 1
+
+        full = Portfolio.from_id(portfolio_id)
+        assert full.obj is partial.obj
+        assert partial.obj['scenarioIds'] == [scenario_id]
+        assert db['fetch_one'].call_count == 2
+
+        Portfolio.from_id(portfolio_id, {'scenarioIds': True})
+        assert db['fetch_one'].call_count == 2
+
+
+def test_completing_a_projection_keeps_pending_changes(mocker):
+    db = _mock_database(mocker)
+    other_project_id = ObjectId()
+
+    with unit_of_work():
+        partial = Portfolio.from_id(portfolio_id, {'projectId': True})
+        partial.set_property('projectId', other_project_id)
+
+        full = Portfolio.from_id(portfolio_id)
+        assert full.obj is partial.obj
+        assert full.obj['projectId'] == other_project_id
+        assert full.obj['scenarioIds'] == [scenario_id]
+
+        partial.update()
+
+    db['update'].assert_called_once_with(portfolio_id, {'$set': {'projectId': other_project_id}}, 'portfolios')
+
+
+def test_updates_are_flushed_once(mocker):
+    db = _mock_database(mocker)
+
+    with unit_of_work():
+        portfolio = Portfolio.from_id(portfolio_id)
+        portfolio.set_property('name', 'a')
+        portfolio.update()
+        portfolio.set_property('name', 'b')
+        portfolio.update()
+
+        db['update'].assert_not_called()
+
+    db['update'].assert_called_once_with(portfolio_id, {'$set': {'name': 'b'}}, 'portfolios')
+
+
+def test_after_flush_runs_after_writes(mocker):
+    db = _mock_database(mocker)
+    calls = []
+
+    with unit_of_work():
+        portfolio = Portfolio.from_id(portfolio_id)
+        portfolio.set_property('name', 'a')
+        portfolio.update()
+        after_flush(lambda: calls.append(db['update'].call_count))
+
+        assert calls == []
+
+    assert calls == [1]
+
+
+def test_after_flush_without_unit_of_work():
+    calls = []
+    after_flush(lambda: calls.append(True))
+    assert calls == [True]
+
+
+def test_without_unit_of_work(mocker):
+    db = _mock_database(mocker)
+
+    portfolio = Portfolio.from_id(portfolio_id)
+    portfolio.set_property('name', 'a')
+    portfolio.update()
+    Portfolio.from_id(portfolio_id)
+
+    assert db['fetch_one'].call_count == 2
+    db['update'].assert_called_once()
+
+
+def test_get_scenario_round_trips(client, mocker):
+    db = _mock_database(mocker)
+
+    assert '200' in client.get(f'/v2/scenarios/{scenario_id}').status
+
+    # Scenario, and the project ID of the portfolio and authorizations of the user for the access check
+    assert db['fetch_one'].call_count == 3
+    assert [call[0][2] for call in db['fetch_one'].call_args_list[1:]] == [{'projectId': True}, {'authorizations': True}]
+
+
+def test_delete_scenario_round_trips(client, mocker):
+    db = _mock_database(mocker)
+
+    assert '200' in client.delete(f'/v2/scenarios/{scenario_id}').status
+
+    # The access check loads only the project ID of the portfolio, which the update completes
+    assert db['fetch_one'].call_count == 4
+    assert db['update'].call_count == 1
+    assert db['delete_one'].call_count == 1
+
+
+def test_add_scenario_round_trips(client, mocker):
+    db = _mock_database(mocker)
+
+    res = client.post(f'/v2/portfolios/{portfolio_id}/scenarios',
+                      json={
+                          'scenario': {
+                              'name': 'test',
+                              'trace': {
+                                  'traceId': str(ObjectId()),
+                                  'loadSamplingFraction': 1.0,
+                              },
+                              'topology': {
+                                  'topologyId': str(topology_id),
+                              },
+                              'operational': {
+                                  'failuresEnabled': True,
+                                  'performanceInterferenceEnabled': False,
+                                  'schedulerName': 'DEFAULT',
+                              },
+                          }
+                      })
+    assert '200' in res.status
+
+    # The user is loaded once, for both access checks (was 4)
+    assert db['fetch_one'].call_count == 3
+    assert db['insert'].call_count == 1
+    assert db['update'].call_count == 1
+
+    # Only the ID of the new scenario is sent to the portfolio
+    assert db['update'].call_args[0][1] == {'$push': {'scenarioIds': {'$each': [db['insert'].call_args[0][0]['_id']]}}}
+
+
+def test_delete_project_round_trips(client, mocker):
+    db = _mock_database(mocker)
+
+    assert '200' in client.delete(f'/v2/projects/{project_id}').status
+
+    # Project and user, regardless of the number of topologies and portfolios
+    assert db['fetch_one'].call_count == 2
+    assert db['delete_all'].call_count == 2
+    assert db['delete_one'].call_count == 1
+    assert db['update'].call_count == 1
+
+
+def test_create_project_round_trips(client, mocker):
+    db = _mock_database(mocker)
+
+    assert '200' in client.post('/v2/projects', json={'project': {'name': 'test'}}).status
+
+    # The topology is inserted with its project ID, instead of being updated afterwards (was 4 writes)
+    assert db['insert'].call_count == 2
+    assert db['update'].call_count == 1
+    assert db['insert'].call_args_list[0][0][0]['projectId'] == db['insert'].call_args_list[1][0][0]['_id']
+
+
+def test_pending_update():
+    portfolio = Portfolio({'_id': portfolio_id, 'scenarioIds': [1, 2], 'targets': {'repeatsPerScenario': 1}})
+
+    portfolio.push_property('scenarioIds', 3)
+    portfolio.push_property('scenarioIds', 4)
+    portfolio.set_property('targets.repeatsPerScenario', 2)
+    assert portfolio.pending_update() == {
+        '$push': {
+            'scenarioIds': {
+                '$each': [3, 4]
+            }
+        },
+        '$set': {
+            'targets.repeatsPerScenario': 2
+        }
+    }
+
+    portfolio.pull_property('scenarioIds', 1)
+    portfolio.set_property('targets', {'repeatsPerScenario': 3})
+    assert portfolio.pending_update() == {'$set': {'scenarioIds': [2, 3, 4], 'targets': {'repeatsPerScenario': 3}}}
+
+
+def test_update_sends_changed_fields(mocker):
+    """Compares the bytes sent when renaming a large topology with the bytes of a full replacement."""
+    db = _mock_database(mocker)
+
+    rooms = [{
+        'name': f'Room {i}',
+        'tiles': [{
+            'positionX': j,
+            'positionY': j,
+            'rack': {
+                'machines': [{
+                    'cpus': ['Intel Xeon E-2246G'],
+                    'memories': ['Samsung 64 GB']
+                }] * 32
+            }
+        } for j in range(10)]
+    } for i in range(10)]
+    topology = Topology({'_id': topology_id, 'projectId': project_id, 'name': 'Topology', 'rooms': rooms})
+
+    topology.set_property('name', 'Renamed topology')
+    topology.update()
+
+    update = db['update'].call_args[0][1]
+    assert update == {'$set': {'name': 'Renamed topology'}}
+
+    update_bytes = len(BSON.encode(update))
+    replacement_bytes = len(BSON.encode(topology.obj))
+    assert update_bytes * 100 < replacement_bytes
@@ -1,5 +1,5 @@
+from opendc.models.authorization import AUTHORIZATIONS
 from opendc.models.model import Model
-from opendc.models.user import User
 from opendc.util.exceptions import ClientError
 from opendc.util.rest import Response
 
@@ -17,11 +17,9 @@ class Topology(Model):
         :param google_id: The Google ID of the user.
         :param edit_access: True when edit access should be checked, otherwise view access.
         """
-        user = User.from_google_id(google_id)
         if 'projectId' not in self.obj:
             raise ClientError(Response(400, 'Missing projectId in topology.'))
 
-        authorizations = list(
-            filter(lambda x: str(x['projectId']) == str(self.obj['projectId']), user.obj['authorizations']))
-        if len(authorizations) == 0 or (edit_access and authorizations[0]['authorizationLevel'] == 'VIEW'):
+        level = AUTHORIZATIONS.get_level(google_id, self.obj.get('projectId'))
+        if not level or (edit_access and level == 'VIEW'):
             raise ClientError(Response(403, 'Forbidden from retrieving topology.'))
@@ -12,12 +12,12 @@ class User(Model):
     @classmethod
     def from_email(cls, email):
         """Fetches the user with given email from the collection."""
-        return User(DB.fetch_one({'email': email}, User.collection_name))
+        return User(cls._fetch_one({'email': email}))
 
     @classmethod
-    def from_google_id(cls, google_id):
-        """Fetches the user with given Google ID from the collection."""
-        return User(DB.fetch_one({'googleId': google_id}, User.collection_name))
+    def from_google_id(cls, google_id, projection=None):
+        """Fetches the user with given Google ID from the collection, optionally limited to the projected fields."""
+        return User(cls._fetch_one({'googleId': google_id}, projection))
 
     def check_correct_user(self, request_google_id):
         """Raises an error if a user tries to modify another user.
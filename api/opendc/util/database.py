@@ -1,42 +1,219 @@
 import urllib.parse
+from collections import OrderedDict
 from datetime import datetime
 
-from pymongo import MongoClient
+import os
+import time
+
+from pymongo import MongoClient, InsertOne, UpdateOne, DeleteMany
+
+from opendc.util.pool_metrics import POOL_METRICS
 
 DATETIME_STRING_FORMAT = '%Y-%m-%dT%H:%M:%S'
 CONNECTION_POOL = None
 
+# Environment variables configuring the MongoClient, mapped to its option names and value types
+CLIENT_OPTIONS = {
+    'OPENDC_DB_MAX_POOL_SIZE': ('maxPoolSize', int),
+    'OPENDC_DB_MIN_POOL_SIZE': ('minPoolSize', int),
+    'OPENDC_DB_MAX_IDLE_TIME_MS': ('maxIdleTimeMS', int),
+    'OPENDC_DB_WAIT_QUEUE_TIMEOUT_MS': ('waitQueueTimeoutMS', int),
+    'OPENDC_DB_CONNECT_TIMEOUT_MS': ('connectTimeoutMS', int),
+    'OPENDC_DB_SOCKET_TIMEOUT_MS': ('socketTimeoutMS', int),
+    'OPENDC_DB_SERVER_SELECTION_TIMEOUT_MS': ('serverSelectionTimeoutMS', int),
+    'OPENDC_DB_COMPRESSORS': ('compressors', str),
+    'OPENDC_DB_ZLIB_COMPRESSION_LEVEL': ('zlibCompressionLevel', int),
+    'OPENDC_DB_READ_PREFERENCE': ('readPreference', str),
+}
+
+# Topology documents compress well, so compression is negotiated with the server unless configured otherwise. The
+# first compressor that the server supports is used. Snappy can be added when python-snappy is installed.
+DEFAULT_COMPRESSORS = 'zstd,zlib'
+
+
+def client_options(environ=None):
+    """Returns the keyword arguments of the MongoClient, as configured by the given (or the process) environment."""
+    environ = os.environ if environ is None else environ
+    options = {'compressors': DEFAULT_COMPRESSORS}
+
+    for variable, (option, parse) in CLIENT_OPTIONS.items():
+        value = environ.get(variable)
+        if value:
+            options[option] = parse(value)
+
+    return options
+
+
+def _conflicts(update, other):
+    """Returns whether the field paths of the given update documents overlap, other than by setting the same path."""
+    for operator, fields in update.items():
+        for other_operator, other_fields in other.items():
+            for p in fields:
+                for q in other_fields:
+                    if p == q and operator == other_operator == '$set':
+                        continue
+                    if p == q or p.startswith(q + '.') or q.startswith(p + '.'):
+                        return True
+
+    return False
+
+
+def merge_updates(updates, update):
+    """Merges the given update document into the last of the given list of update documents.
+
+    If their field paths conflict, the update document is appended to the list instead, to be applied after the
+    others.
+    """
+    if updates and not _conflicts(update, updates[-1]):
+        for operator, fields in update.items():
+            updates[-1].setdefault(operator, {}).update(fields)
+    else:
+        updates.append(update)
+
+    return updates
+
+
+class WriteBatch:
+    """Write operations queued per collection, to be executed with as few round-trips as possible.
+
+    On flush, all operations on a collection are sent as a single `bulk_write`, with the deletions merged into a
+    single `delete_many` using `$in`. Collections with only one pending operation use the plain operation instead.
+    """
+    def __init__(self, database):
+        self.database = database
+        self.collections = OrderedDict()
+
+    def _pending(self, collection):
+        if collection not in self.collections:
+            self.collections[collection] = {'inserts': OrderedDict(), 'updates': OrderedDict(), 'deletes': []}
+        return self.collections[collection]
+
+    def insert(self, obj, collection):
+        """Queues the insertion of the given object, which must already have an `_id`."""
+        self._pending(collection)['inserts'][obj['_id']] = obj
+
+    def update(self, _id, update, collection):
+        """Queues the given update operators (e.g. `{'$set': {...}}`) for an existing object.
+
+        Updates of an object whose insertion is queued are dropped: the queued object is the enclosed object of the
+        model, which already reflects the update.
+        """
+        pending = self._pending(collection)
+
+        if _id not in pending['inserts']:
+            merge_updates(pending['updates'].setdefault(_id, []), update)
+
+    def delete(self, _id, collection):
+        """Queues the deletion of the object with the given ID, dropping its queued insertion or update."""
+        pending = self._pending(collection)
+        pending['updates'].pop(_id, None)
+
+        if pending['inserts'].pop(_id, None) is None and _id not in pending['deletes']:
+            pending['deletes'].append(_id)
+
+    def __len__(self):
+        return sum(
+            len(pending['inserts']) + sum(map(len, pending['updates'].values())) + len(pending['deletes'])
+            for pending in self.collections.values())
+
+    def flush(self):
+        """Executes all queued operations."""
+        collections = self.collections
+        self.collections = OrderedDict()
+
+        for collection, pending in collections.items():
+            inserts = list(pending['inserts'].values())
+            updates = [(_id, update) for _id, updates in pending['updates'].items() for update in updates]
+            deletes = pending['deletes']
+
+            if len(inserts) + len(updates) + min(len(deletes), 1) > 1:
+                operations = [InsertOne(obj) for obj in inserts]
+                operations += [UpdateOne({'_id': _id}, update) for _id, update in updates]
+                if deletes:
+                    operations.append(DeleteMany({'_id': {'$in': deletes}}))
+                self.database.bulk_write(operations, collection)
+            elif inserts:
+                self.database.insert(inserts[0], collection)
+            elif updates:
+                self.database.update(updates[0][0], updates[0][1], collection)
+            elif len(deletes) == 1:
+                self.database.delete_one({'_id': deletes[0]}, collection)
+            elif deletes:
+                self.database.delete_all({'_id': {'$in': deletes}}, collection)
+
 
 class Database:
     """Object holding functionality for database access."""
     def __init__(self):
+        self.client = None
+        self.options = None
         self.opendc_db = None
 
-    def initialize_database(self, user, password, database, host):
-        """Initializes the database connection."""
+    def initialize_database(self, user, password, database, host, options=None):
+        """Initializes the database connection.
+
+        The options are passed to the MongoClient, and are read from the environment by default (see
+        `client_options`). The connection pool events of the client are counted in `POOL_METRICS`.
+        """
 
         user = urllib.parse.quote_plus(user)
         password = urllib.parse.quote_plus(password)
         database = urllib.parse.quote_plus(database)
         host = urllib.parse.quote_plus(host)
 
-        client = MongoClient('mongodb://%s:%s@%s/default_db?authSource=%s' % (user, password, host, database))
-        self.opendc_db = client.opendc
+        self.options = client_options() if options is None else options
 
-    def fetch_one(self, query, collection):
+        self.client = MongoClient('mongodb://%s:%s@%s/default_db?authSource=%s' % (user, password, host, database),
+                                  event_listeners=[POOL_METRICS],
+                                  **self.options)
+        self.opendc_db = self.client.opendc
+
+    def health(self, detailed=False):
+        """Pings the database and returns its status, the round-trip time and the number of pooled connections.
+
+        When detailed, the error of a failed ping, the options of the client and all statistics of the pool are
+        included too.
+        """
+        if self.client is None:
+            return {'status': 'uninitialized'}
+
+        pool = POOL_METRICS.stats()
+        start = time.perf_counter()
+        try:
+            self.client.admin.command('ping')
+        except Exception as e:  # pylint: disable=broad-except
+            if detailed:
+                return {'status': 'unavailable', 'error': str(e), 'pool': pool}
+            return {'status': 'unavailable'}
+
+        data = {
+            'status': 'ok',
+            'pingSeconds': time.perf_counter() - start,
+            'pool': {
+                'open': pool['open'],
+                'inUse': pool['inUse']
+            },
+        }
+        if detailed:
+            data.update({'maxPoolSize': self.client.max_pool_size, 'options': self.options, 'pool': pool})
+        return data
+
+    def fetch_one(self, query, collection, projection=None):
         """Uses existing mongo connection to return a single (the first) document in a collection matching the given
         query as a JSON object.
 
-        The query needs to be in json format, i.e.: `{'name': prefab_name}`.
+        The query needs to be in json format, i.e.: `{'name': prefab_name}`. The optional projection limits the
+        returned fields, i.e.: `{'name': True}`.
         """
-        return getattr(self.opendc_db, collection).find_one(query)
+        return getattr(self.opendc_db, collection).find_one(query, projection)
 
-    def fetch_all(self, query, collection):
+    def fetch_all(self, query, collection, projection=None):
         """Uses existing mongo connection to return all documents matching a given query, as a list of JSON objects.
 
-        The query needs to be in json format, i.e.: `{'name': prefab_name}`.
+        The query needs to be in json format, i.e.: `{'name': prefab_name}`. The optional projection limits the
+        returned fields, i.e.: `{'name': True}`.
         """
-        cursor = getattr(self.opendc_db, collection).find(query)
+        cursor = getattr(self.opendc_db, collection).find(query, projection)
         return list(cursor)
 
     def insert(self, obj, collection):
@@ -45,9 +222,17 @@ class Database:
 
         return bson
 
-    def update(self, _id, obj, collection):
-        """Updates an existing object."""
-        return getattr(self.opendc_db, collection).update({'_id': _id}, obj)
+    def update(self, _id, update, collection):
+        """Applies the given update operators (e.g. `{'$set': {'name': name}}`) to an existing object."""
+        return getattr(self.opendc_db, collection).update_one({'_id': _id}, update)
+
+    def bulk_write(self, operations, collection):
+        """Executes the given write operations (e.g. `InsertOne`, `DeleteMany`) in a single round-trip."""
+        return getattr(self.opendc_db, collection).bulk_write(operations)
+
+    def batch(self):
+        """Returns a new batch of write operations on this database."""
+        return WriteBatch(self)
 
     def delete_one(self, query, collection):
         """Deletes one object matching the given query.
@@ -1,36 +1,90 @@
 import json
 import os
 
+# Compiled route tables, keyed by API version
+_ROUTERS = {}
 
-def parse(version, endpoint_path):
-    """Map an HTTP endpoint path to an API path"""
 
-    # Get possible paths
-    with open(os.path.join(os.path.dirname(__file__), '..', 'api', '{}', 'paths.json').format(version)) as paths_file:
-        paths = json.load(paths_file)
+def _paths_file(version):
+    """Return the location of the `paths.json` file of the given API version."""
+    return os.path.join(os.path.dirname(__file__), '..', 'api', version, 'paths.json')
 
-    # Find API path that matches endpoint_path
-    endpoint_path_parts = endpoint_path.strip('/').split('/')
-    paths_parts = [x.strip('/').split('/') for x in paths if len(x.strip('/').split('/')) == len(endpoint_path_parts)]
-    path = None
 
-    for path_parts in paths_parts:
-        found = True
-        for (endpoint_part, part) in zip(endpoint_path_parts, path_parts):
-            if not part.startswith('{') and endpoint_part != part:
-                found = False
-                break
-        if found:
-            path = path_parts
+def load_paths(version):
+    """Read the API path templates of the given version from its `paths.json` file."""
+    with open(_paths_file(version)) as paths_file:
+        return json.load(paths_file)
 
-    if path is None:
-        return None
 
-    # Extract path parameters
+def compile_paths(paths):
+    """Compile a list of path templates into a segment trie.
+
+    Every node of the trie is a dict with the following keys:
+     - `literals`: maps literal segments to child nodes;
+     - `parameters`: maps the names of `{name}` segments to child nodes;
+     - `path`: the segments of the template ending at this node, or None.
+    """
+    root = _new_node()
+
+    for path in paths:
+        parts = path.strip('/').split('/')
+        node = root
+
+        for part in parts:
+            if part.startswith('{'):
+                node = node['parameters'].setdefault(part.strip('{}'), _new_node())
+            else:
+                node = node['literals'].setdefault(part, _new_node())
+
+        node['path'] = parts
+
+    return root
+
+
+def _new_node():
+    return {'literals': {}, 'parameters': {}, 'path': None}
+
+
+def _resolve(node, parts, index, parameters):
+    """Walk the trie along the given parts, preferring literal segments over parameters."""
+    if index == len(parts):
+        return node['path']
+
+    part = parts[index]
+
+    child = node['literals'].get(part)
+    if child is not None:
+        path = _resolve(child, parts, index + 1, parameters)
+        if path is not None:
+            return path
+
+    for name, child in node['parameters'].items():
+        path = _resolve(child, parts, index + 1, parameters)
+        if path is not None:
+            parameters[name] = part
+            return path
+
+    return None
+
+
+def get_router(version):
+    """Return the compiled route table of the given API version, compiling it on first use."""
+    router = _ROUTERS.get(version)
+
+    if router is None:
+        router = compile_paths(load_paths(version))
+        _ROUTERS[version] = router
+
+    return router
+
+
+def parse(version, endpoint_path):
+    """Map an HTTP endpoint path to an API path"""
+
     parameters = {}
+    path = _resolve(get_router(version), endpoint_path.strip('/').split('/'), 0, parameters)
 
-    for (name, value) in zip(path, endpoint_path_parts):
-        if name.startswith('{'):
-            parameters[name.strip('{}')] = value
+    if path is None:
+        return None
 
     return '{}/{}'.format(version, '/'.join(path)), parameters
@@ -0,0 +1,97 @@
+import threading
+import time
+
+from pymongo import monitoring
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool listener keeping counters of the MongoDB connection pools of a client.
+
+    The counters show how many connections the workers use concurrently and how long they wait to check one out,
+    which is what the pool size and the number of workers should be sized by.
+    """
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._started = threading.local()
+
+        self.open = 0
+        self.in_use = 0
+        self.max_in_use = 0
+        self.checkouts = 0
+        self.checkout_failures = {}
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.pools_cleared = 0
+
+    def stats(self):
+        """Return a snapshot of the counters."""
+        with self._lock:
+            return {
+                'open': self.open,
+                'inUse': self.in_use,
+                'maxInUse': self.max_in_use,
+                'checkouts': self.checkouts,
+                'checkoutFailures': dict(self.checkout_failures),
+                'waitSeconds': self.wait_seconds,
+                'maxWaitSeconds': self.max_wait_seconds,
+                'poolsCleared': self.pools_cleared,
+            }
+
+    def connection_check_out_started(self, event):
+        # Connections are checked out by the thread issuing the operation, so the start time is kept per thread
+        self._started.time = self.clock()
+
+    def connection_checked_out(self, event):
+        wait = self._wait()
+
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+            self.wait_seconds += wait
+            self.max_wait_seconds = max(self.max_wait_seconds, wait)
+
+    def connection_check_out_failed(self, event):
+        wait = self._wait()
+
+        with self._lock:
+            self.checkout_failures[event.reason] = self.checkout_failures.get(event.reason, 0) + 1
+            self.wait_seconds += wait
+            self.max_wait_seconds = max(self.max_wait_seconds, wait)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open -= 1
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pools_cleared += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def _wait(self):
+        """Return the time since the current thread started checking out a connection."""
+        started = getattr(self._started, 'time', None)
+        self._started.time = None
+        return 0.0 if started is None else self.clock() - started
+
+
+# Counters of the pools of the client of the application
+POOL_METRICS = PoolMetrics()
@@ -1,17 +1,81 @@
 import importlib
 import json
 import os
+import time
 
 from oauth2client import client, crypt
 
-from opendc.util import exceptions, parameter_checker
+from opendc.util import exceptions, parameter_checker, path_parser
 from opendc.util.exceptions import ClientError
+from opendc.util.token_cache import TokenCache
+
+REST_METHODS = ['POST', 'GET', 'PUT', 'PATCH', 'DELETE']
+
+# Maps API path templates to a dict of the handlers per REST method
+ENDPOINTS = {}
+
+
+def register_endpoints(version):
+    """Import the endpoint modules of all paths of the given API version and register their handlers.
+
+    Returns the paths listed in `paths.json` that have no handler.
+    """
+    missing = []
+
+    for path in path_parser.load_paths(version):
+        path = '{}/{}'.format(version, path.strip('/'))
+        module_path = path.replace('{', '').replace('}', '').replace('/', '.')
+
+        try:
+            module = importlib.import_module('opendc.api.{}.endpoint'.format(module_path))
+        except ImportError:
+            missing.append(path)
+            continue
+
+        handlers = {method: getattr(module, method) for method in REST_METHODS if hasattr(module, method)}
+
+        if not handlers:
+            missing.append(path)
+            continue
+
+        ENDPOINTS[path] = handlers
+
+    return missing
+
+
+def _verify_id_token(token):
+    """Return the claims of the given Google ID token.
+
+    Or throw an Exception if the token is invalid.
+    """
+
+    try:
+        id_info = client.verify_id_token(token, os.environ['OPENDC_OAUTH_CLIENT_ID'])
+    except Exception as e:
+        print(e)
+        raise crypt.AppIdentityError('Exception caught trying to verify ID token: {}'.format(e))
+
+    if id_info['aud'] != os.environ['OPENDC_OAUTH_CLIENT_ID']:
+        raise crypt.AppIdentityError('Unrecognized client.')
+
+    if id_info['iss'] not in ['accounts.google.com', 'https://accounts.google.com']:
+        raise crypt.AppIdentityError('Wrong issuer.')
+
+    return id_info
+
+
+# Verified ID tokens, shared by all requests
+TOKEN_CACHE = TokenCache(_verify_id_token)
 
 
 class Request:
     """WebSocket message to REST request mapping."""
-    def __init__(self, message=None):
-        """"Initialize a Request from a socket message."""
+    def __init__(self, message=None, session=None):
+        """"Initialize a Request from a socket message.
+
+        The optional session dict is bound to the connection the message was received on. It remembers the verified
+        token of that connection, so that the token is only verified once per connection.
+        """
 
         # Get the Request parameters from the message
 
@@ -35,25 +99,21 @@ class Request:
         except KeyError as exception:
             raise exceptions.MissingRequestParameterError(exception)
 
-        # Parse the path and import the appropriate module
+        # Look up the handlers of the endpoint
 
-        try:
-            self.path = message['path'].strip('/')
+        self.path = message['path'].strip('/')
 
-            module_base = 'opendc.api.{}.endpoint'
-            module_path = self.path.replace('{', '').replace('}', '').replace('/', '.')
-
-            self.module = importlib.import_module(module_base.format(module_path))
-        except ImportError as e:
-            print(e)
+        handlers = ENDPOINTS.get(self.path)
+        if handlers is None:
             raise exceptions.UnimplementedEndpointError('Unimplemented endpoint: {}.'.format(self.path))
 
         # Check the method
 
-        if self.method not in ['POST', 'GET', 'PUT', 'PATCH', 'DELETE']:
+        if self.method not in REST_METHODS:
             raise exceptions.UnsupportedMethodError('Non-rest method: {}'.format(self.method))
 
-        if not hasattr(self.module, self.method):
+        self.handler = handlers.get(self.method)
+        if self.handler is None:
             raise exceptions.UnsupportedMethodError('Unimplemented method at endpoint {}: {}'.format(
                 self.path, self.method))
 
@@ -63,11 +123,20 @@ class Request:
             self.google_id = 'test'
             return
 
+        if session is not None and session.get('token') == self.token and session['expires'] > time.time():
+            self.google_id = session['google_id']
+            return
+
         try:
-            self.google_id = self._verify_token(self.token)
+            id_info = self._verify_token(self.token)
         except crypt.AppIdentityError as e:
             raise exceptions.AuthorizationTokenError(e)
 
+        self.google_id = id_info['sub']
+
+        if session is not None and 'exp' in id_info:
+            session.update(token=self.token, google_id=self.google_id, expires=float(id_info['exp']))
+
     def check_required_parameters(self, **kwargs):
         """Raise an error if a parameter is missing or of the wrong type."""
 
@@ -76,13 +145,19 @@ class Request:
         except exceptions.ParameterError as e:
             raise ClientError(Response(400, str(e)))
 
+    def get_fields(self):
+        """Return the fields requested with the optional, comma-separated `fields` query parameter, or None."""
+
+        fields = [field.strip() for field in str(self.params_query.get('fields', '')).split(',')]
+        fields = [field for field in fields if field]
+
+        return fields or None
+
     def process(self):
         """Process the Request and return a Response."""
 
-        method = getattr(self.module, self.method)
-
         try:
-            response = method(self)
+            response = self.handler(self)
         except ClientError as e:
             e.response.id = self.id
             return e.response
@@ -101,24 +176,12 @@ class Request:
 
     @staticmethod
     def _verify_token(token):
-        """Return the ID of the signed-in user.
+        """Return the claims of the token of the signed-in user, using previously verified tokens where possible.
 
         Or throw an Exception if the token is invalid.
         """
 
-        try:
-            id_info = client.verify_id_token(token, os.environ['OPENDC_OAUTH_CLIENT_ID'])
-        except Exception as e:
-            print(e)
-            raise crypt.AppIdentityError('Exception caught trying to verify ID token: {}'.format(e))
-
-        if id_info['aud'] != os.environ['OPENDC_OAUTH_CLIENT_ID']:
-            raise crypt.AppIdentityError('Unrecognized client.')
-
-        if id_info['iss'] not in ['accounts.google.com', 'https://accounts.google.com']:
-            raise crypt.AppIdentityError('Wrong issuer.')
-
-        return id_info['sub']
+        return TOKEN_CACHE.get(token)
 
 
 class Response:
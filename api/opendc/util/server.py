@@ -0,0 +1,165 @@
+"""Transport-independent handling of API requests, shared by the Flask server and the asyncio server."""
+import json
+import os
+import sys
+import traceback
+import urllib.request
+
+from oauth2client import client, crypt
+
+from opendc.models.model import unit_of_work
+from opendc.models.user import User
+from opendc.util import rest, path_parser
+from opendc.util.database import DB
+from opendc.util.exceptions import AuthorizationTokenError, RequestInitializationError
+
+API_VERSIONS = {'v2'}
+
+
+def register_api():
+    """Compile the route tables and register the endpoint handlers once, instead of on every request."""
+    for api_version in API_VERSIONS:
+        path_parser.get_router(api_version)
+
+        for missing_path in rest.register_endpoints(api_version):
+            print(f'Warning: no handler implemented for `/{missing_path}`')
+
+
+def sign_in(token):
+    """Authenticate a user with Google sign in.
+
+    Returns the response data, or None if the token could not be verified.
+    """
+
+    try:
+        idinfo = client.verify_id_token(token, os.environ['OPENDC_OAUTH_CLIENT_ID'])
+
+        if idinfo['aud'] != os.environ['OPENDC_OAUTH_CLIENT_ID']:
+            raise crypt.AppIdentityError('Unrecognized client.')
+
+        if idinfo['iss'] not in ['accounts.google.com', 'https://accounts.google.com']:
+            raise crypt.AppIdentityError('Wrong issuer.')
+    except ValueError:
+        url = "https://www.googleapis.com/oauth2/v3/tokeninfo?id_token={}".format(token)
+        req = urllib.request.Request(url)
+        response = urllib.request.urlopen(url=req, timeout=30)
+        res = response.read()
+        idinfo = json.loads(res)
+    except crypt.AppIdentityError:
+        return None
+
+    user = User.from_google_id(idinfo['sub'], {'_id': True})
+
+    data = {'isNewUser': user.obj is None}
+
+    if user.obj is not None:
+        data['userId'] = user.get_id()
+
+    return data
+
+
+def health(detailed=None):
+    """Report the health of the server: the status of the database and the number of pooled connections.
+
+    The endpoint is not authenticated, so the options of the database client and the statistics of the pool and the
+    token cache are only reported when `OPENDC_HEALTH_DETAILS` is set, or when detailed is passed.
+
+    Returns the response data and the HTTP status code.
+    """
+    if detailed is None:
+        detailed = 'OPENDC_HEALTH_DETAILS' in os.environ
+
+    data = {'database': DB.health(detailed)}
+    if detailed:
+        data['tokenCache'] = rest.TOKEN_CACHE.stats()
+    status = 503 if data['database']['status'] == 'unavailable' else 200
+
+    return data, status
+
+
+def http_message(version, endpoint_path, method, query_parameters, data, token):
+    """Build the request message of an API call over HTTP.
+
+    Returns a tuple of the message and None, or of None and an error description if no endpoint matches.
+    """
+
+    # Check whether given version is valid
+    if version not in API_VERSIONS:
+        return None, 'API version not found'
+
+    # Get path and parameters
+    parsed_path = path_parser.parse(version, endpoint_path)
+    if parsed_path is None:
+        return None, 'Endpoint not found'
+
+    (path, path_parameters) = parsed_path
+
+    query_parameters = dict(query_parameters)
+    for param in query_parameters:
+        try:
+            query_parameters[param] = int(query_parameters[param])
+        except:
+            pass
+
+    try:
+        body_parameters = json.loads(data)
+    except:
+        body_parameters = {}
+
+    return {
+        'id': 0,
+        'method': method,
+        'parameters': {
+            'body': body_parameters,
+            'path': path_parameters,
+            'query': query_parameters
+        },
+        'path': path,
+        'token': token
+    }, None
+
+
+def process_message(message, session=None):
+    """Process a request message and return the response.
+
+    This blocks on the database, so asynchronous servers must run it outside of their event loop.
+    """
+
+    try:
+        req = rest.Request(message, session)
+
+        with unit_of_work():
+            res = req.process()
+
+        return req, res
+
+    except AuthorizationTokenError:
+        res = rest.Response(401, 'Authorization error')
+        res.id = message['id']
+
+    except RequestInitializationError as e:
+        res = rest.Response(400, str(e))
+        res.id = message['id']
+
+        if not 'method' in message:
+            message['method'] = 'UNSPECIFIED'
+        if not 'path' in message:
+            message['path'] = 'UNSPECIFIED'
+
+    except Exception:
+        res = rest.Response(500, 'Internal server error')
+        if 'id' in message:
+            res.id = message['id']
+        traceback.print_exc()
+
+    req = rest.Request()
+    req.method = message['method']
+    req.path = message['path']
+
+    return req, res
+
+
+def log_response(transport, req, res):
+    """Print a line describing the handled request."""
+    print(f'{transport}\t{req.method} to `/{req.path}` resulted in {res.status["code"]}: {res.status["description"]}')
+    sys.stdout.flush()
@@ -0,0 +1,28 @@
+from bench_path_parser import ENDPOINT_PATHS, legacy_parse
+from opendc.util import path_parser
+
+
+def test_parse_matches_legacy():
+    for endpoint_path in ENDPOINT_PATHS:
+        assert path_parser.parse('v2', endpoint_path) == legacy_parse('v2', endpoint_path)
+
+
+def test_parse_extracts_parameters():
+    assert path_parser.parse('v2', 'projects/abc/portfolios') == ('v2/projects/{projectId}/portfolios', {
+        'projectId': 'abc'
+    })
+
+
+def test_parse_prefers_literal_segments():
+    assert path_parser.parse('v2', 'prefabs/authorizations') == ('v2/prefabs/authorizations', {})
+
+
+def test_parse_backtracks_to_parameter_segments():
+    router = path_parser.compile_paths(['/a/b', '/a/{x}/c'])
+    parameters = {}
+    assert path_parser._resolve(router, ['a', 'b', 'c'], 0, parameters) == ['a', '{x}', 'c']
+    assert parameters == {'x': 'b'}
+
+
+def test_parse_unknown_path():
+    assert path_parser.parse('v2', 'does/not/exist') is None
@@ -0,0 +1,57 @@
+from pymongo.monitoring import ConnectionCheckOutFailedReason
+
+from opendc.util.pool_metrics import PoolMetrics
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Event:
+    def __init__(self, reason=None):
+        self.address = ('localhost', 27017)
+        self.reason = reason
+
+
+def test_checkouts():
+    clock = Clock()
+    metrics = PoolMetrics(clock=clock)
+
+    metrics.connection_created(Event())
+    metrics.connection_created(Event())
+
+    for wait in [0.5, 1.5]:
+        metrics.connection_check_out_started(Event())
+        clock.now += wait
+        metrics.connection_checked_out(Event())
+
+    metrics.connection_checked_in(Event())
+    metrics.connection_closed(Event())
+
+    stats = metrics.stats()
+    assert stats['open'] == 1
+    assert stats['inUse'] == 1
+    assert stats['maxInUse'] == 2
+    assert stats['checkouts'] == 2
+    assert stats['waitSeconds'] == 2.0
+    assert stats['maxWaitSeconds'] == 1.5
+
+
+def test_checkout_failures():
+    clock = Clock()
+    metrics = PoolMetrics(clock=clock)
+
+    metrics.connection_check_out_started(Event())
+    clock.now += 3.0
+    metrics.connection_check_out_failed(Event(ConnectionCheckOutFailedReason.TIMEOUT))
+    metrics.pool_cleared(Event())
+
+    stats = metrics.stats()
+    assert stats['checkoutFailures'] == {ConnectionCheckOutFailedReason.TIMEOUT: 1}
+    assert stats['maxWaitSeconds'] == 3.0
+    assert stats['checkouts'] == 0
+    assert stats['poolsCleared'] == 1
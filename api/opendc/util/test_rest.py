@@ -0,0 +1,54 @@
+import importlib
+
+import pytest
+
+from opendc.util import rest
+from opendc.util.exceptions import UnimplementedEndpointError, UnsupportedMethodError
+
+
+def _message(path, method):
+    return {
+        'id': 1,
+        'path': path,
+        'method': method,
+        'parameters': {
+            'body': {},
+            'path': {},
+            'query': {}
+        },
+        'token': None
+    }
+
+
+def test_all_paths_have_handlers():
+    assert rest.register_endpoints('v2') == []
+
+
+def test_registered_handler():
+    from opendc.api.v2.projects.projectId import endpoint
+
+    assert rest.ENDPOINTS['v2/projects/{projectId}']['GET'] is endpoint.GET
+    assert rest.Request(_message('/v2/projects/{projectId}/', 'GET')).handler is endpoint.GET
+
+
+def test_unknown_path_does_not_import(mocker):
+    import_module = mocker.spy(importlib, 'import_module')
+
+    with pytest.raises(UnimplementedEndpointError):
+        rest.Request(_message('v2/unknown', 'GET'))
+
+    import_module.assert_not_called()
+
+
+def test_non_rest_method():
+    with pytest.raises(UnsupportedMethodError):
+        rest.Request(_message('v2/projects', 'FETCH'))
+
+
+def test_unimplemented_method():
+    with pytest.raises(UnsupportedMethodError):
+        rest.Request(_message('v2/projects', 'GET'))
+
+
+def test_http_unknown_path(client):
+    assert '404' in client.get('/v2/does/not/exist').status
@@ -0,0 +1,44 @@
+from opendc.util import server
+from opendc.util.database import DB
+
+
+def test_http_message():
+    (message, error) = server.http_message('v2', 'projects/1/topologies', 'POST', {'a': '1', 'b': 'x'}, b'{"c": 2}',
+                                           'token')
+
+    assert error is None
+    assert message['path'] == 'v2/projects/{projectId}/topologies'
+    assert message['parameters'] == {'body': {'c': 2}, 'path': {'projectId': '1'}, 'query': {'a': 1, 'b': 'x'}}
+    assert message['token'] == 'token'
+
+
+def test_http_message_not_found():
+    assert server.http_message('v1', 'projects', 'GET', {}, b'', None) == (None, 'API version not found')
+    assert server.http_message('v2', 'nonexistent', 'GET', {}, b'', None) == (None, 'Endpoint not found')
+
+
+def test_process_message_unimplemented():
+    (req, res) = server.process_message({'id': 1, 'path': 'v2/nonexistent', 'method': 'GET'})
+
+    assert res.status['code'] == 400
+    assert req.path == 'v2/nonexistent'
+
+
+def test_health(client):
+    res = client.get('/health')
+
+    assert '200' in res.status
+    assert res.get_json() == {'database': {'status': 'uninitialized'}}
+
+
+def test_health_details(client, monkeypatch):
+    monkeypatch.setenv('OPENDC_HEALTH_DETAILS', 'True')
+    res = client.get('/health')
+
+    assert '200' in res.status
+    assert 'hits' in res.get_json()['tokenCache']
+
+
+def test_health_unavailable(client, mocker):
+    mocker.patch.object(DB, 'health', return_value={'status': 'unavailable', 'error': 'timeout', 'pool': {}})
+    assert '503' in client.get('/health').status
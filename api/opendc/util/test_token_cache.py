@@ -0,0 +1,99 @@
+import pytest
+
+from opendc.util import rest
+from opendc.util.token_cache import TokenCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _verifier(calls):
+    def verify(token):
+        calls.append(token)
+        if token == 'invalid':
+            raise ValueError('Invalid token')
+        return {'sub': 'user-' + token, 'exp': 1100}
+
+    return verify
+
+
+def test_cache_hit():
+    calls = []
+    cache = TokenCache(_verifier(calls), clock=Clock())
+
+    assert cache.get('a')['sub'] == 'user-a'
+    assert cache.get('a')['sub'] == 'user-a'
+
+    assert calls == ['a']
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+    assert cache.stats()['verifications'] == 1
+
+
+def test_cache_respects_expiry():
+    calls = []
+    clock = Clock()
+    cache = TokenCache(_verifier(calls), clock=clock)
+
+    cache.get('a')
+    clock.now = 1100.0
+    cache.get('a')
+
+    assert calls == ['a', 'a']
+
+
+def test_cache_is_bounded():
+    calls = []
+    cache = TokenCache(_verifier(calls), max_size=2, clock=Clock())
+
+    cache.get('a')
+    cache.get('b')
+    cache.get('a')
+    cache.get('c')
+    cache.get('a')
+    cache.get('b')
+
+    assert calls == ['a', 'b', 'c', 'b']
+    assert cache.stats()['size'] == 2
+
+
+def test_cache_does_not_store_invalid_tokens():
+    calls = []
+    cache = TokenCache(_verifier(calls), clock=Clock())
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            cache.get('invalid')
+
+    assert calls == ['invalid', 'invalid']
+    assert cache.stats()['size'] == 0
+
+
+def test_socket_session_verifies_once(mocker, monkeypatch):
+    monkeypatch.delenv('OPENDC_FLASK_TESTING')
+    verify = mocker.patch.object(rest.Request, '_verify_token', return_value={'sub': 'test', 'exp': 2e10})
+
+    session = {}
+    message = {
+        'id': 1,
+        'path': 'v2/projects',
+        'method': 'POST',
+        'parameters': {
+            'body': {},
+            'path': {},
+            'query': {}
+        },
+        'token': 'token'
+    }
+
+    assert rest.Request(message, session).google_id == 'test'
+    assert rest.Request(message, session).google_id == 'test'
+    verify.assert_called_once_with('token')
+
+    rest.Request(dict(message, token='other'), session)
+    assert verify.call_count == 2
@@ -0,0 +1,78 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenCache:
+    """Bounded cache of verified ID tokens, keyed by token hash.
+
+    Entries expire at the `exp` claim of the token they were verified from, so a cached token is never accepted for
+    longer than the token itself is valid.
+    """
+    def __init__(self, verify, max_size=1024, clock=time.time):
+        """Initialize a new TokenCache.
+
+        :param verify: Function verifying a token, returning its claims or raising an error.
+        :param max_size: The maximum number of tokens to keep; the least recently used token is evicted first.
+        :param clock: Function returning the current time in seconds since the epoch.
+        """
+        self.verify = verify
+        self.max_size = max_size
+        self.clock = clock
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.verifications = 0
+        self.verification_seconds = 0.0
+
+    def get(self, token):
+        """Return the claims of the given token, verifying it only if it is not cached (anymore)."""
+        key = hashlib.sha256(token.encode('utf-8')).hexdigest() if isinstance(token, str) else None
+
+        if key is not None:
+            with self._lock:
+                entry = self._entries.get(key)
+
+                if entry is not None and entry[0] > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+
+                self._entries.pop(key, None)
+                self.misses += 1
+
+        start = time.perf_counter()
+        try:
+            claims = self.verify(token)
+        finally:
+            with self._lock:
+                self.verifications += 1
+                self.verification_seconds += time.perf_counter() - start
+
+        if key is not None and 'exp' in claims:
+            with self._lock:
+                self._entries[key] = (float(claims['exp']), claims)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+
+        return claims
+
+    def clear(self):
+        """Remove all cached tokens."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return the counters of this cache."""
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'verifications': self.verifications,
+                'verificationSeconds': self.verification_seconds,
+            }
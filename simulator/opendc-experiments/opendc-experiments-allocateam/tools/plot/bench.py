@@ -0,0 +1,350 @@
+"""This module benchmarks the metrics on synthetic lifecycle tables.
+
+Each metric is first checked against the reference (row-by-row) implementation it replaced, and both are timed on the
+same tables, small enough for the reference implementation to finish. The metric is then timed on its own on tables of
+the requested size.
+"""
+
+import argparse
+import math
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from metrics import Metric
+from metrics.job_makespan import job_makespans
+from metrics.idle_time import idle_matrix, idle_percentages
+from metrics.job_waiting_time import job_waiting_times
+from metrics.power_consumption import server_power_consumption
+from metrics.utilization import bucket_edges, busy_servers
+
+
+def synthetic_lifecycles(tasks: int, tasks_per_job: int = 10, servers: int = 256, seed: int = 0):
+    """Generate job-lifecycle and task-lifecycle tables shaped like the output of the experiment.
+
+    Args:
+        tasks (int): Number of tasks.
+        tasks_per_job (int): Average number of tasks per job.
+        servers (int): Number of servers the tasks run on.
+        seed (int): Seed of the random generator.
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: The job and task lifecycle tables. Some jobs have no tasks, and some tasks
+        never start, as happens when the experiment ends before the workload does.
+    """
+    rng = np.random.default_rng(seed)
+    jobs = max(1, tasks // tasks_per_job)
+
+    job_ids = np.arange(jobs)
+    job_submission = np.sort(rng.integers(0, 3600 * 1000 * 24, jobs))
+
+    # The last percent of the jobs has no tasks, and the tasks of every 50th job never start
+    task_job_ids = rng.integers(0, jobs - jobs // 100, tasks)
+    task_submission = job_submission[task_job_ids]
+    task_start = (task_submission + rng.exponential(60 * 1000, tasks).astype(np.int64)).astype(float)
+    task_finish = task_start + rng.exponential(600 * 1000, tasks).astype(np.int64)
+
+    not_started = (rng.random(tasks) < 0.01) | (task_job_ids % 50 == 0)
+    task_start[not_started] = np.nan
+    task_finish[not_started] = np.nan
+
+    task_df = pd.DataFrame({
+        "task_id": np.arange(tasks),
+        "job_id": task_job_ids,
+        "server_id": rng.integers(0, servers, tasks),
+        "submission_time": task_submission,
+        "start_time": task_start,
+        "finish_time": task_finish,
+    })
+
+    first_start = task_df.groupby("job_id").start_time.min().reindex(job_ids)
+    last_finish = task_df.groupby("job_id").finish_time.max().reindex(job_ids)
+    job_df = pd.DataFrame({
+        "job_id": job_ids,
+        "submission_time": job_submission,
+        "start_time": first_start.to_numpy(),
+        "finish_time": last_finish.to_numpy(),
+    })
+
+    return job_df, task_df
+
+
+def synthetic_power_consumption(samples: int, servers: int = 256, seed: int = 0):
+    """Generate a power-consumption table shaped like the output of the experiment.
+
+    Args:
+        samples (int): Number of wattage samples.
+        servers (int): Number of servers the samples are taken from.
+        seed (int): Seed of the random generator.
+
+    Returns:
+        Tuple[pd.DataFrame, int]: The power consumption table, in no particular order, and the run duration.
+    """
+    rng = np.random.default_rng(seed)
+    # Timestamps are unique, so that the order of samples taken at the same time does not matter
+    run_duration = max(3600 * 24, samples * 4)
+
+    power_df = pd.DataFrame({
+        "timestamp": rng.choice(run_duration, samples, replace=False),
+        "server_id": rng.integers(0, servers, samples),
+        "wattage": rng.uniform(50, 350, samples),
+    })
+
+    return power_df, run_duration
+
+
+def synthetic_busy_times(servers: int, seed: int = 0):
+    """Generate the busy time of the servers of runs on topologies of 32, 256 and 10000 machines.
+
+    Args:
+        servers (int): Total number of servers that ran a task, over all runs.
+        seed (int): Seed of the random generator.
+
+    Returns:
+        Tuple[List[np.ndarray], np.ndarray, np.ndarray]: The busy time of each used server per run, and the workload
+        duration and number of machines of each run. Not all machines of a run are used.
+    """
+    rng = np.random.default_rng(seed)
+    machines = []
+    while sum(machines) < servers:
+        machines.append([32, 256, 10000][len(machines) % 3])
+
+    workload_durations = rng.uniform(3600 * 1000, 3600 * 1000 * 24, len(machines))
+    busy_times = [
+        rng.uniform(0, duration, rng.integers(machine_count // 2, machine_count + 1))
+        for machine_count, duration in zip(machines, workload_durations)
+    ]
+    return busy_times, workload_durations, np.array(machines)
+
+
+def synthetic_task_timeline(tasks: int, seed: int = 0):
+    """Generate a task-lifecycle table and the edges of hourly buckets covering it."""
+    _, task_df = synthetic_lifecycles(tasks, seed=seed)
+    return task_df, bucket_edges(task_df.finish_time.max() // 1000, 3600)
+
+
+def reference_job_waiting_times(job_df, task_df):
+    for _, job in job_df.iterrows():
+        tasks = task_df[task_df.job_id == job.job_id]
+        waiting_time = (tasks.start_time.min() - job.submission_time) // 1000
+        if math.isnan(waiting_time):
+            continue
+        yield waiting_time
+
+
+def reference_job_makespans(job_df, task_df):
+    for job_id in job_df.job_id.unique():
+        tasks = task_df[task_df.job_id == job_id]
+        makespan = (tasks.finish_time.max() - tasks.submission_time.min()) // 1000
+        if math.isnan(makespan):
+            continue
+        yield makespan
+
+
+def reference_power_consumption(df, run_duration):
+    power_consumption = []
+    for node in df.server_id.unique():
+        timestamps = df[df.server_id == node].sort_values(by='timestamp')
+        durations = np.array(list(timestamps.timestamp[1:]) + [run_duration]) - np.array(list(timestamps.timestamp))
+        timestamps['durations'] = durations / 60 / 60
+        timestamps['watt-hours'] = timestamps['wattage'] * timestamps['durations']
+        power_consumption.append(
+            timestamps['watt-hours'].sum()
+        )
+
+    yield sum(power_consumption)
+
+
+def power_consumption(power_df, run_duration):
+    yield server_power_consumption(power_df, run_duration).sum()
+
+
+def whole(function):
+    """Call a metric over batches of tasks with the task table as a single batch."""
+    return lambda job_df, task_df: function(job_df, [task_df])
+
+
+def streamed(function, batches=10):
+    """Call a metric over batches of tasks with the task table split into the given number of batches."""
+    def call(job_df, task_df):
+        size = -(-len(task_df) // batches)
+        return function(job_df, (task_df.iloc[i:i + size] for i in range(0, len(task_df), size)))
+    return call
+
+
+def reference_idle_percentages(busy_times, workload_durations, machines):
+    for busy, workload_duration, topology_size in zip(busy_times, workload_durations, machines):
+        idle_time = workload_duration - busy
+        unused_server_time = workload_duration * (topology_size - len(busy))
+        yield (idle_time.sum() + unused_server_time) / topology_size / workload_duration * 100
+
+
+def reference_busy_servers(task_df, edges):
+    tasks = task_df[task_df.start_time.notna()]
+    for start, end in zip(edges[:-1], edges[1:]):
+        busy_time = 0
+        for _, server_tasks in tasks.groupby("server_id"):
+            # Merge the overlapping tasks of the server within the bucket
+            intervals = sorted(zip((server_tasks.start_time / 1000).clip(start, end),
+                                   (server_tasks.finish_time.fillna(edges[-1] * 1000) / 1000).clip(start, end)))
+            covered_until = start
+            for interval_start, interval_end in intervals:
+                busy_time += max(0, interval_end - max(interval_start, covered_until))
+                covered_until = max(covered_until, interval_end)
+        yield busy_time / (end - start)
+
+
+def vectorized_idle_percentages(busy_times, workload_durations, machines):
+    return idle_percentages(idle_matrix(busy_times, workload_durations, machines), workload_durations)
+
+
+# Benchmarked metrics: name, reference implementation, vectorized implementation and generator of the input tables
+BENCHMARKS = [
+    ("job_waiting_time", reference_job_waiting_times, whole(job_waiting_times), synthetic_lifecycles),
+    ("job_waiting_time_streamed", reference_job_waiting_times, streamed(job_waiting_times), synthetic_lifecycles),
+    ("job_makespan", reference_job_makespans, whole(job_makespans), synthetic_lifecycles),
+    ("job_makespan_streamed", reference_job_makespans, streamed(job_makespans), synthetic_lifecycles),
+    ("idle_time", reference_idle_percentages, vectorized_idle_percentages, synthetic_busy_times),
+    ("busy_servers", reference_busy_servers, busy_servers, synthetic_task_timeline),
+    ("power_consumption", reference_power_consumption, power_consumption, synthetic_power_consumption),
+]
+
+
+class SyntheticMetric(Metric):
+    def __init__(self, plot, scenarios, values=None):
+        super().__init__(plot, scenarios)
+        self.name = "synthetic"
+        self.scenario_values = values
+
+    def get_data(self, scenario):
+        return self.scenario_values[scenario.scenario_id]
+
+
+def synthetic_scenarios(values: int, scenarios: int = 100, seed: int = 0):
+    """Generate scenarios and the values of a per-job metric for each of them."""
+    rng = np.random.default_rng(seed)
+    experiments = pd.DataFrame({
+        "portfolio_id": np.arange(scenarios) // 10,
+        "scenario_id": np.arange(scenarios),
+        "run_id": 0,
+        "topology": [["small", "medium", "large"][i % 3] for i in range(scenarios)],
+        "workload_name": [f"spec_trace-{i % 4}" for i in range(scenarios)],
+        "allocation_policy": [f"policy-{i % 7}" for i in range(scenarios)],
+    })
+    scenario_values = [rng.exponential(600, values // scenarios) // 1 for _ in range(scenarios)]
+    return [run for _, run in experiments.iterrows()], scenario_values
+
+
+def reference_metric_dataframe(name, scenarios, scenario_values):
+    result = []
+    for scenario in scenarios:
+        for value in scenario_values[scenario.scenario_id]:
+            result.append({
+                "portfolio_id": scenario.portfolio_id,
+                "topology": scenario.topology,
+                "workload": scenario.workload_name,
+                "allocation_policy": scenario.allocation_policy,
+                name: value,
+            })
+    return pd.DataFrame.from_dict(result)
+
+
+def measure(function, *args):
+    """Return the result of the function, the seconds it took and the peak of the memory it allocated.
+
+    The function is called twice, since tracing the allocations slows it down.
+    """
+    start = time.perf_counter()
+    result = function(*args)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, seconds, peak
+
+
+def benchmark_metric_dataframe(values: int, seed: int):
+    scenarios, scenario_values = synthetic_scenarios(values, seed=seed)
+    metric = SyntheticMetric([], scenarios, scenario_values)
+    for scenario in scenarios:
+        metric.values(scenario)
+
+    expected, reference_seconds, reference_peak = measure(reference_metric_dataframe, metric.name, scenarios,
+                                                          scenario_values)
+    actual, seconds, peak = measure(metric.metric_dataframe)
+
+    # The descriptor columns are categorical instead of strings
+    assert expected.equals(actual.astype(expected.dtypes.to_dict())), \
+        "metric_dataframe differs from the reference implementation"
+
+    print(f"metric_dataframe: equal to the reference implementation ({len(actual)} rows)")
+    print(f"metric_dataframe: {seconds:.3f} s, {peak / 1024 ** 2:.1f} MiB peak "
+          f"(reference: {reference_seconds:.3f} s, {reference_peak / 1024 ** 2:.1f} MiB peak)")
+
+
+def check_parity(name, reference, implementation, tables):
+    expected = np.asarray(list(reference(*tables)), dtype=float)
+    actual = np.asarray(list(implementation(*tables)), dtype=float)
+
+    # Sums may be accumulated in a different order
+    assert expected.shape == actual.shape and np.allclose(expected, actual, rtol=1e-12, atol=0), \
+        f"{name} differs from the reference implementation"
+    print(f"{name}: equal to the reference implementation ({len(actual)} values)")
+
+
+def time_call(function, *args):
+    start = time.perf_counter()
+    list(function(*args))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the metrics on synthetic lifecycle tables.")
+    parser.add_argument("metrics",
+                        nargs="*",
+                        help="The metrics to benchmark, or metric_dataframe to benchmark building the dataframe of a "
+                        "metric from its values (default: all).")
+    parser.add_argument("--tasks",
+                        type=int,
+                        default=1000000,
+                        help="Number of tasks (or power samples) to time the metrics on.")
+    parser.add_argument("--parity-tasks",
+                        type=int,
+                        default=20000,
+                        help="Number of tasks (or power samples) to check the metrics on and to time them against their "
+                        "reference implementation.")
+    parser.add_argument("--dataframe-rows",
+                        type=int,
+                        default=200000,
+                        help="Number of values to build the dataframe of a metric from.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic tables.")
+    args = parser.parse_args()
+
+    benchmarks = [b for b in BENCHMARKS if not args.metrics or b[0] in args.metrics]
+
+    for name, reference, implementation, generate in benchmarks:
+        small = generate(args.parity_tasks, seed=args.seed)
+        large = generate(args.tasks, seed=args.seed)
+
+        check_parity(name, reference, implementation, small)
+
+        reference_seconds = time_call(reference, *small)
+        seconds = time_call(implementation, *small)
+        print(f"{name}: {seconds:.3f} s for {args.parity_tasks} rows (reference: {reference_seconds:.3f} s, "
+              f"speedup: {reference_seconds / seconds:.1f}x)")
+
+        seconds = time_call(implementation, *large)
+        print(f"{name}: {seconds:.3f} s for {args.tasks} rows")
+
+    if not args.metrics or "metric_dataframe" in args.metrics:
+        benchmark_metric_dataframe(args.dataframe_rows, args.seed)
+
+
+if __name__ == "__main__":
+    """Usage: python3 bench.py [--tasks 1000000] [<metric> ...]"""
+    main()
@@ -0,0 +1,76 @@
+"""This module computes the metrics of the Allocateam experiment into the metric store of the data dir.
+
+The store is read by `plot.py` and `verify_repeatability.py`. Only the metrics of runs whose telemetry changed since
+they were last computed (or that were never computed) are computed again.
+"""
+
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+import metrics
+from metrics import ScenarioTable
+from metrics.compute import compute
+from metrics.data import BASE_DATA_PATH, DATA_LOADER
+from metrics.store import METRIC_STORE
+
+ALL_METRICS = [
+    metrics.JobTurnaroundTimeMetric,
+    metrics.TaskThroughputMetric,
+    metrics.PowerConsumptionMetric,
+    metrics.IdleTimeMetric,
+    metrics.JobWaitingTimeMetric,
+    metrics.JobMakespanMetric,
+    metrics.UtilizationTimelineMetric,
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute the metrics of the Allocateam experiment into the store.")
+    parser.add_argument(
+        "path",
+        nargs='?',
+        type=str,
+        help="The path to the data dir.",
+        default=BASE_DATA_PATH,
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=None,
+        help="Stream the task lifecycle tables in batches of this many rows instead of loading them at once, to "
+        "bound the memory used by tables larger than memory.",
+    )
+    parser.add_argument(
+        "--bucket-width",
+        type=int,
+        default=metrics.UtilizationTimelineMetric.bucket_width,
+        help="The width in seconds of the buckets of the utilization timeline.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="The number of worker processes computing the metrics.",
+    )
+    args = parser.parse_args()
+
+    DATA_LOADER.root = Path(args.path)
+    DATA_LOADER.batch_size = args.batch_size
+    metrics.UtilizationTimelineMetric.bucket_width = args.bucket_width
+    METRIC_STORE.enabled = True
+    METRIC_STORE.writable = True
+
+    scenarios = ScenarioTable(pd.read_parquet(DATA_LOADER.root / "experiments.parquet"))
+    compute([metric([], scenarios) for metric in ALL_METRICS], scenarios, args.jobs)
+
+    print(f"Metrics of {len(scenarios)} runs stored in {METRIC_STORE.root}")
+    if args.jobs <= 1:
+        stats = METRIC_STORE.stats()
+        print(f"{stats['hits']} up to date, {stats['misses']} computed")
+
+
+if __name__ == "__main__":
+    """Usage: python3 compute.py <path_to_data_dir>"""
+    main()
@@ -4,6 +4,8 @@ from .job_turnaround_time import JobTurnaroundTimeMetric
 from .job_waiting_time import JobWaitingTimeMetric
 from .power_consumption import PowerConsumptionMetric
 from .task_throughput import TaskThroughputMetric
+from .utilization import UtilizationTimelineMetric
 
 from .metric import Metric
 from .plot import Plot
+from .scenario import ScenarioTable
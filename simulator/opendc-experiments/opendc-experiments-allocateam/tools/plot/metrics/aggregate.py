@@ -0,0 +1,34 @@
+from typing import Iterable
+
+import pandas as pd
+
+# How partial results of each aggregation are merged
+MERGES = {"min": "min", "max": "max", "sum": "sum", "count": "sum", "size": "sum"}
+
+
+def _merge(partials, merges) -> pd.DataFrame:
+    if len(partials) == 1:
+        return partials[0]
+    combined = pd.concat(partials)
+    return combined.groupby(level=list(range(combined.index.nlevels))).agg(merges)
+
+
+def grouped(batches: Iterable[pd.DataFrame], by, merge_every: int = 64, **aggregations) -> pd.DataFrame:
+    """Aggregate batches of rows per group, as if the batches were concatenated into a single frame first.
+
+    The aggregations are given as named aggregations of `DataFrame.groupby(...).agg`, e.g.
+    `first_start=("start_time", "min")`, and must be one of min, max, sum, count or size. Each batch is aggregated on
+    its own, and the partial results are merged at once every `merge_every` batches and at the end, so only a single
+    batch and a bounded number of per-group results are in memory.
+    """
+    merges = {name: MERGES[how] for name, (_, how) in aggregations.items()}
+    partials = []
+
+    for batch in batches:
+        partials.append(batch.groupby(by).agg(**aggregations))
+        if len(partials) > merge_every:
+            partials = [_merge(partials, merges)]
+
+    if not partials:
+        return pd.DataFrame({name: pd.Series(dtype=float) for name in aggregations})
+    return _merge(partials, merges)
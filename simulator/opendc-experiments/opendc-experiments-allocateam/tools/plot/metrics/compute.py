@@ -0,0 +1,51 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import List
+
+from .data import DATA_LOADER
+from .metric import Metric
+from .store import METRIC_STORE
+
+
+def _init_worker(root, max_bytes, batch_size, store_enabled, store_writable):
+    DATA_LOADER.root = root
+    DATA_LOADER.max_bytes = max_bytes
+    DATA_LOADER.batch_size = batch_size
+    METRIC_STORE.enabled = store_enabled
+    METRIC_STORE.writable = store_writable
+
+
+def _compute_scenario(metric_classes, scenario):
+    """Compute the values of the given metrics, with their parameters, for a single scenario, in a worker process."""
+    values = []
+    for metric_class, parameters in metric_classes:
+        for name, value in parameters.items():
+            setattr(metric_class, name, value)
+        values.append(metric_class([], []).values(scenario))
+    return values
+
+
+def compute(metrics: List[Metric], scenarios, jobs: int = 1):
+    """Compute the values of the metrics for the scenarios, in parallel over the scenarios if more than one job is used.
+
+    Each worker process computes all metrics of a scenario, so that the tables of the scenario are decoded once. The
+    values are kept by the metrics (see `Metric.values`), and values that were computed before are not computed again.
+    """
+    scenarios = [s for s in scenarios if not all(metric.is_computed(s) for metric in metrics)]
+
+    if jobs <= 1:
+        for scenario in scenarios:
+            for metric in metrics:
+                metric.values(scenario)
+        return
+
+    metric_classes = [(type(metric), metric.parameter_values()) for metric in metrics]
+
+    with ProcessPoolExecutor(jobs,
+                             initializer=_init_worker,
+                             initargs=(DATA_LOADER.root, DATA_LOADER.max_bytes, DATA_LOADER.batch_size,
+                                       METRIC_STORE.enabled, METRIC_STORE.writable)) as executor:
+        results = executor.map(_compute_scenario, repeat(metric_classes), scenarios)
+        for scenario, values_per_metric in zip(scenarios, results):
+            for metric, values in zip(metrics, values_per_metric):
+                metric.store(scenario, values)
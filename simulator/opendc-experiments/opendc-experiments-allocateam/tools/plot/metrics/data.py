@@ -0,0 +1,133 @@
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import pandas as pd
+import pyarrow.dataset as ds
+
+BASE_DATA_PATH = (Path(__file__).parent / "../../../data").resolve()
+
+
+class ScenarioDataLoader:
+    """Memory-bounded LRU cache of the telemetry tables of scenarios, shared by all metrics.
+
+    Tables are keyed by their name (e.g. "task-lifecycle") and the run of the scenario. Only the requested columns are
+    read; when a later metric needs more columns of a cached table, only the missing columns are read and added to it.
+
+    Each table is read as a dataset over its hive-partitioned directory (`<name>/portfolio_id=…/scenario_id=…/
+    run_id=…`), which is discovered once. The run of a scenario is selected by filtering on the partition columns,
+    so only the files of that run are opened.
+
+    Tables that are too large to be loaded at once can be streamed in batches of rows instead, by setting the batch
+    size (see `batches`).
+    """
+
+    def __init__(self, root: Path = BASE_DATA_PATH, max_bytes: int = 1024 ** 3, batch_size: Optional[int] = None):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.batch_size = batch_size
+        self.datasets = {}
+        self.entries = OrderedDict()
+        self.cached_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.bytes_decoded = 0
+
+    def load(self, name: str, scenario, columns: List[str]) -> pd.DataFrame:
+        """Load the given columns of a table of the scenario.
+
+        The returned frame is shared with other metrics and must not be modified.
+        """
+        key = (name, scenario.portfolio_id, scenario.scenario_id, scenario.run_id)
+        df = self.entries.pop(key, None)
+
+        if df is not None:
+            self.cached_bytes -= _size(df)
+            missing = [column for column in columns if column not in df.columns]
+        else:
+            missing = list(columns)
+
+        if missing:
+            self.misses += 1
+            decoded = self._read(name, scenario, missing)
+            self.bytes_decoded += _size(decoded)
+            df = decoded if df is None else pd.concat([df, decoded], axis=1)
+        else:
+            self.hits += 1
+
+        self.entries[key] = df
+        self.cached_bytes += _size(df)
+        self._evict()
+
+        return df[list(columns)]
+
+    def batches(self, name: str, scenario, columns: List[str]) -> Iterator[pd.DataFrame]:
+        """Iterate over the given columns of a table of the scenario in batches of at most `batch_size` rows.
+
+        Batches are decoded one at a time and are not cached, so the memory used is bounded by the batch size instead
+        of the size of the table. Without a batch size, the (cached) table is returned as a single batch.
+        """
+        if self.batch_size is None:
+            yield self.load(name, scenario, columns)
+            return
+
+        self.misses += 1
+        scanned = self.dataset(name).to_batches(columns=columns,
+                                                filter=self._partition(scenario),
+                                                batch_size=self.batch_size)
+        for batch in scanned:
+            if batch.num_rows == 0:
+                continue
+
+            df = batch.to_pandas()
+            self.bytes_decoded += _size(df)
+            yield df
+
+    def dataset(self, name: str) -> ds.Dataset:
+        """Return the dataset of the table with the given name, discovering its files on first use."""
+        if name not in self.datasets:
+            self.datasets[name] = ds.dataset(self.root / name, format="parquet", partitioning="hive")
+        return self.datasets[name]
+
+    @staticmethod
+    def _partition(scenario) -> ds.Expression:
+        return (ds.field("portfolio_id") == _scalar(scenario.portfolio_id)) & \
+               (ds.field("scenario_id") == _scalar(scenario.scenario_id)) & \
+               (ds.field("run_id") == _scalar(scenario.run_id))
+
+    def _read(self, name, scenario, columns):
+        return self.dataset(name).to_table(columns=columns, filter=self._partition(scenario)).to_pandas()
+
+    def _evict(self):
+        # The most recently used table is kept, even if it is larger than the budget on its own
+        while self.cached_bytes > self.max_bytes and len(self.entries) > 1:
+            _, df = self.entries.popitem(last=False)
+            self.cached_bytes -= _size(df)
+
+    def clear(self):
+        self.datasets.clear()
+        self.entries.clear()
+        self.cached_bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "tables": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "bytes_decoded": self.bytes_decoded,
+            "bytes_cached": self.cached_bytes,
+        }
+
+
+def _scalar(value):
+    # Convert NumPy scalars (e.g. the IDs of a row of the experiments table) to the Python values pyarrow expects
+    return value.item() if hasattr(value, "item") else value
+
+
+def _size(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+# Loader shared by all metrics of a plotting run
+DATA_LOADER = ScenarioDataLoader()
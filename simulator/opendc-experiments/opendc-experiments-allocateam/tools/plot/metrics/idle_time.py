@@ -1,37 +1,91 @@
-from .metric import Metric, metric_path
+from pathlib import Path
+from typing import List
+
+import numpy as np
 import pandas as pd
 
+from .aggregate import grouped
+from .metric import Metric
+from .scenario import scenario_key
+from .topology import TOPOLOGIES
+
+
+def idle_matrix(busy_times: List[np.ndarray], workload_durations, machines) -> np.ndarray:
+    """Returns the idle time of each machine of each run, as a matrix with a row per run and a column per machine.
+
+    Args:
+        busy_times: The total busy time of each server that ran a task, per run.
+        workload_durations: The duration of the workload of each run.
+        machines: The number of machines of the topology of each run.
+
+    The servers that ran a task take the first columns of their run, and the other machines of the topology are idle
+    during the whole workload. Columns beyond the number of machines of the topology of a run are NaN.
+    """
+    workload_durations = np.asarray(workload_durations, dtype=np.float64)
+    machines = np.asarray(machines)
+    counts = np.array([len(busy) for busy in busy_times], dtype=np.int64)
+    if np.any(counts > machines):
+        raise ValueError("A run used more servers than its topology has machines")
+
+    columns = np.arange(machines.max(initial=0))
+    matrix = np.where(columns < machines[:, None], workload_durations[:, None], np.nan)
+
+    rows = np.repeat(np.arange(len(counts)), counts)
+    positions = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    if len(rows):
+        matrix[rows, positions] -= np.concatenate(busy_times)
+    return matrix
+
+
+def idle_percentages(matrix: np.ndarray, workload_durations) -> np.ndarray:
+    """Returns the average idle percentage per machine of each run of an idle matrix."""
+    return np.nanmean(matrix, axis=1) / np.asarray(workload_durations, dtype=np.float64) * 100
+
 
 class IdleTimeMetric(Metric):
+    columns = {
+        "job-lifecycle": ["finish_time"],
+        "task-lifecycle": ["server_id", "start_time", "finish_time"],
+    }
+
     def __init__(self, plot, scenarios):
         super().__init__(plot, scenarios)
         self.name = "idle_time"
         self.x_axis_label = "Average idle percentage (per machine)"
 
+    def input_files(self, scenario) -> List[Path]:
+        return [TOPOLOGIES.path(scenario.topology)]
+
+    def busy_times(self, scenario) -> np.ndarray:
+        """Return the total time each server of the scenario spent running tasks, in order of server ID."""
+        task_durations = (
+            pd.DataFrame({"server_id": batch.server_id, "duration": batch.finish_time - batch.start_time})
+            for batch in self.load_batches("task-lifecycle", scenario)
+        )
+        return grouped(task_durations, "server_id", duration=("duration", "sum")).duration.to_numpy()
+
+    def workload_duration(self, scenario):
+        return self.load("job-lifecycle", scenario).finish_time.max()
+
+    def idle_matrix(self, scenarios=None) -> pd.DataFrame:
+        """Return the idle time of each machine of each scenario, see `idle_matrix`.
+
+        The rows are indexed by (portfolio_id, scenario_id, run_id), e.g. to plot the utilization of the machines.
+        """
+        scenarios = list(self.scenarios if scenarios is None else scenarios)
+        matrix = idle_matrix(
+            [self.busy_times(scenario) for scenario in scenarios],
+            [self.workload_duration(scenario) for scenario in scenarios],
+            [TOPOLOGIES.machines(scenario.topology) for scenario in scenarios],
+        )
+        index = pd.MultiIndex.from_tuples(
+            [scenario_key(scenario) for scenario in scenarios],
+            names=["portfolio_id", "scenario_id", "run_id"],
+        )
+        return pd.DataFrame(matrix, index=index)
+
     def get_data(self, scenario):
-        job_df = pd.read_parquet(metric_path("job-lifecycle", scenario))
-        task_df = pd.read_parquet(metric_path("task-lifecycle", scenario))
-        task_df["duration"] = task_df.finish_time - task_df.start_time
-
-        server_stats = task_df.groupby("server_id").aggregate({"duration": ["sum"]})
-        workload_duration = job_df.finish_time.max()
-        server_stats["idle_time"] = workload_duration - server_stats.duration
-
-        sizes = {
-            "small": 32,
-            "medium": 256,
-            "large": 10000
-        }
-        topology_size = sizes[scenario.topology]
-        unused_servers = topology_size - len(server_stats)
-        unused_server_time = workload_duration * unused_servers
-        if unused_servers > 0:
-            print(f"Warning: topology not fully utilised ({unused_servers} machine(s) that are 100% idle)")
-            print("topology: {}, allocation policy: {}, workload: {}".format(
-                scenario.topology,
-                scenario.allocation_policy,
-                scenario.workload_name
-            ))
-            print()
-        mean_idle_time_per_server = (server_stats.idle_time.sum() + unused_server_time) / topology_size
-        yield mean_idle_time_per_server / workload_duration * 100
+        # The matrix is built per scenario, so that the tables of a scenario are only loaded while it is computed
+        workload_duration = self.workload_duration(scenario)
+        matrix = idle_matrix([self.busy_times(scenario)], [workload_duration], [TOPOLOGIES.machines(scenario.topology)])
+        yield idle_percentages(matrix, [workload_duration])[0]
@@ -1,26 +1,36 @@
-from .metric import Metric, metric_path
-import pandas as pd
-import math
+from .aggregate import grouped
+from .metric import Metric
+
+
+def job_makespans(job_df, task_batches):
+    """Returns the makespan in seconds of each job that has a finished task, in the order of job_df.
+
+    The makespan of a job is the time elapsed from the first submission of one of its tasks until the last completion
+    of one of its tasks. The tasks are given as an iterable of batches of the task lifecycle table.
+    """
+    tasks = grouped(
+        task_batches,
+        "job_id",
+        first_task_submission_time=("submission_time", "min"),
+        last_task_finish_time=("finish_time", "max"),
+    )
+    jobs = tasks.reindex(job_df.job_id.unique())
+
+    makespans = (jobs.last_task_finish_time - jobs.first_task_submission_time) // 1000
+    return makespans.dropna().to_numpy()
 
 
 class JobMakespanMetric(Metric):
+    columns = {
+        "job-lifecycle": ["job_id"],
+        "task-lifecycle": ["job_id", "submission_time", "finish_time"],
+    }
+
     def __init__(self, plot, scenarios):
         super().__init__(plot, scenarios)
         self.name = "job_makespan"
         self.x_axis_label = "Job makespan (seconds)"
 
     def get_data(self, scenario):
-        job_df = pd.read_parquet(metric_path("job-lifecycle", scenario))
-        task_df = pd.read_parquet(metric_path("task-lifecycle", scenario))
-
-        for job_id in job_df.job_id.unique():
-            tasks = task_df[task_df.job_id == job_id]
-
-            # job makespan: time elapsed from first-task submission of job until last completion of task from job
-            first_task_submission_time = tasks.submission_time.min()
-            last_task_finish_time = tasks.finish_time.max()
-            makespan = (last_task_finish_time - first_task_submission_time) // 1000
-            if math.isnan(makespan):
-                continue
-
-            yield makespan
+        job_df = self.load("job-lifecycle", scenario)
+        return job_makespans(job_df, self.load_batches("task-lifecycle", scenario))
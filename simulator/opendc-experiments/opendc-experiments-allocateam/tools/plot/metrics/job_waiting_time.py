@@ -1,27 +1,31 @@
-import pandas as pd
-from .metric import Metric, metric_path
-import math
+from .aggregate import grouped
+from .metric import Metric
+
+
+def job_waiting_times(job_df, task_batches):
+    """Returns the waiting time in seconds of each job that has a started task, in the order of job_df.
+
+    The waiting time of a job is the time elapsed from the submission of the job to the first start of one of its
+    tasks. The tasks are given as an iterable of batches of the task lifecycle table.
+    """
+    first_task_start = grouped(task_batches, "job_id", first_task_start=("start_time", "min")).first_task_start
+    jobs = job_df[["job_id", "submission_time"]].merge(first_task_start, left_on="job_id", right_index=True)
+
+    waiting_times = (jobs.first_task_start - jobs.submission_time) // 1000
+    return waiting_times.dropna().to_numpy()
 
 
 class JobWaitingTimeMetric(Metric):
+    columns = {
+        "job-lifecycle": ["job_id", "submission_time"],
+        "task-lifecycle": ["job_id", "start_time"],
+    }
+
     def __init__(self, plot, scenarios):
         super().__init__(plot, scenarios)
         self.name = "job_waiting_time"
         self.x_axis_label = "Job waiting time (seconds)"
 
     def get_data(self, scenario):
-        job_df = pd.read_parquet(metric_path("job-lifecycle", scenario))
-        task_df = pd.read_parquet(metric_path("task-lifecycle", scenario))
-
-        for _, job in job_df.iterrows():
-            tasks = task_df[task_df.job_id == job.job_id]
-
-            # job waiting time: time elapsed from the first task-submission of a job
-            # to the first start of a task of that job
-            job_sub_time = job.submission_time
-            first_task_start = tasks.start_time.min()
-            waiting_time = (first_task_start - job_sub_time) // 1000
-            if math.isnan(waiting_time):
-                continue
-
-            yield waiting_time
+        job_df = self.load("job-lifecycle", scenario)
+        return job_waiting_times(job_df, self.load_batches("task-lifecycle", scenario))
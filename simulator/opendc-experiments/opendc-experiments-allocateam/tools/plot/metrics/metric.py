@@ -1,21 +1,35 @@
 from abc import ABC, abstractmethod
-from typing import Type, List
+from pathlib import Path
+from typing import Dict, Iterator, Tuple, Type, List
+from .data import DATA_LOADER
 from .plot import Plot
+from .render import Figure
+from .scenario import scenario_key
+from .store import METRIC_STORE
+import numpy as np
 import pandas as pd
 
-from pathlib import Path
+# The values of each metric per scenario run, shared by all instances of a metric, so that a metric is computed once
+# per scenario however many plots use it
+RESULTS = {}
 
-BASE_DATA_PATH = (Path(__file__).parent / "../../../data").resolve()
 
+class Metric(ABC):
+    # The columns of each table the metric reads, e.g. {"task-lifecycle": ["job_id", "start_time"]}
+    columns: Dict[str, List[str]] = {}
 
-def metric_path(name, scenario):
-    partition = "portfolio_id={}/scenario_id={}/run_id={}".format(
-        scenario.portfolio_id, scenario.scenario_id, scenario.run_id
-    )
-    return Path(BASE_DATA_PATH) / name / partition / "data.parquet"
+    # The version of the definition of the metric, to be increased when it changes, so that stored values of the
+    # previous definition are recomputed
+    version = 1
 
+    # The names of the class attributes parametrizing the metric, e.g. ("bucket_width",), which are part of the hash of
+    # its stored values and are set in the worker processes computing it
+    parameters: Tuple[str, ...] = ()
+
+    # Whether the order of the values of a scenario is part of the metric, e.g. the buckets of a timeline, as opposed
+    # to a sample of values in no particular order, which are sorted before they are compared
+    ordered = False
 
-class Metric(ABC):
     def __init__(self, plots: List[Type[Plot]], scenarios):
         self.name = "metric"
         self.plots = plots
@@ -23,24 +37,94 @@ class Metric(ABC):
         self.x_axis_label = "no label"
         self.df_cache = None
 
+    @classmethod
+    def parameter_values(cls) -> dict:
+        return {name: getattr(cls, name) for name in cls.parameters}
+
+    def input_files(self, scenario) -> List[Path]:
+        """Return the files the metric reads for the scenario besides its tables, e.g. definitions in the resources.
+
+        Their contents are part of the hash of its stored values.
+        """
+        return []
+
+    def values(self, scenario):
+        """Return the values of the metric for the scenario, computing them only once.
+
+        When the metric store is enabled, values are loaded from the store if they are up to date, and computed
+        otherwise, in which case they are stored if the store is writable.
+        """
+        key = (type(self), scenario_key(scenario))
+        if key in RESULTS:
+            return RESULTS[key]
+
+        if not METRIC_STORE.enabled:
+            self.store(scenario, self.get_data(scenario))
+            return RESULTS[key]
+
+        values = METRIC_STORE.load(self, scenario)
+        if values is None:
+            values = self.get_data(scenario)
+            values = values if isinstance(values, np.ndarray) else list(values)
+            if METRIC_STORE.writable:
+                METRIC_STORE.save(self, scenario, values)
+
+        self.store(scenario, values)
+        return RESULTS[key]
+
+    def store(self, scenario, values):
+        """Store the values of the metric for the scenario, e.g. when they were computed by a worker process."""
+        RESULTS[(type(self), scenario_key(scenario))] = values if isinstance(values, np.ndarray) else list(values)
+
+    def is_computed(self, scenario) -> bool:
+        return (type(self), scenario_key(scenario)) in RESULTS
+
     def metric_dataframe(self) -> pd.DataFrame:
-        result = []
-        for scenario in self.scenarios:
-            for value in self.get_data(scenario):
-                result.append({
-                    "portfolio_id": scenario.portfolio_id,
-                    "topology": scenario.topology,
-                    "workload": scenario.workload_name,
-                    "allocation_policy": scenario.allocation_policy,
-                    self.name: value,
-                })
-        return pd.DataFrame.from_dict(result)
+        """Build the dataframe of the metric with a row per value, from the concatenated values of the scenarios.
 
-    def generate_plot(self, plotter):
+        The columns describing the scenario of a value are categorical, with the categories in order of appearance.
+        """
+        scenarios = list(self.scenarios)
+        values = [np.asarray(self.values(scenario)) for scenario in scenarios]
+        counts = [len(v) for v in values]
+
+        def categorical(attribute):
+            column = pd.Series([getattr(scenario, attribute) for scenario in scenarios], dtype=object)
+            codes, categories = pd.factorize(column)
+            return pd.Categorical.from_codes(np.repeat(codes, counts), categories)
+
+        return pd.DataFrame({
+            "portfolio_id": np.repeat([scenario.portfolio_id for scenario in scenarios], counts),
+            "topology": categorical("topology"),
+            "workload": categorical("workload_name"),
+            "allocation_policy": categorical("allocation_policy"),
+            self.name: np.concatenate(values) if values else np.array([], dtype=float),
+        })
+
+    def figures(self, plotter) -> List[Figure]:
+        """Return the figures of all plots of the metric."""
         if self.df_cache is None:
             self.df_cache = self.metric_dataframe()
-        for plot in self.plots:
-            plot().generate(self.df_cache, self, plotter, self.x_axis_label)
+        return [figure
+                for plot in self.plots
+                for figure in plot().figures(self.df_cache, self, plotter, self.x_axis_label)]
+
+    def generate_plot(self, plotter):
+        plotter.render(self.figures(plotter))
+
+    def load(self, name, scenario) -> pd.DataFrame:
+        """Load the declared columns of a table of the scenario through the shared data loader.
+
+        The returned frame is shared with other metrics and must not be modified.
+        """
+        return DATA_LOADER.load(name, scenario, self.columns[name])
+
+    def load_batches(self, name, scenario) -> Iterator[pd.DataFrame]:
+        """Iterate over the declared columns of a table of the scenario in batches, see `ScenarioDataLoader.batches`.
+
+        The returned frames may be shared with other metrics and must not be modified.
+        """
+        return DATA_LOADER.batches(name, scenario, self.columns[name])
 
     @abstractmethod
     def get_data(self, scenario):
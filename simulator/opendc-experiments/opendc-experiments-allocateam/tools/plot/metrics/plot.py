@@ -1,4 +1,9 @@
 from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import List
+
+from .render import Figure
+from .scenario import scenario_key
 
 import matplotlib.pyplot as plt
 import pandas as pd
@@ -47,9 +52,22 @@ def reformat_large_tick_values(tick_val):
     return new_tick_format
 
 
+def with_workload_topology(data):
+    """Return a copy of the data with a column labelling the workload and topology of each row."""
+    return data.assign(**{"workload-topology": data.workload.astype(str) + " / " + data.topology.astype(str)})
+
+
 class Plot(ABC):
-    @abstractmethod
+    # The version of the drawing code of the plot, to be increased when it changes, so that figures rendered by the
+    # previous version are rendered again
+    version = 1
+
     def generate(self, data: pd.DataFrame, metric, plotter, x_axis_label):
+        plotter.render(self.figures(data, metric, plotter, x_axis_label))
+
+    @abstractmethod
+    def figures(self, data: pd.DataFrame, metric, plotter, x_axis_label) -> List[Figure]:
+        """Return the figures of the plot, to be rendered by the plotter."""
         pass
 
 
@@ -58,33 +76,37 @@ class MetricWorkloadPlot(Plot):
         self.method = None
         self.postfix_path = ""
 
-    def generate(self, data, metric, plotter, x_axis_label):
+    def figures(self, data, metric, plotter, x_axis_label):
+        data = with_workload_topology(data)
+        postfix = f"-{self.postfix_path}" if self.postfix_path else ""
+
+        figures = []
         for topology in data.topology.unique():
-            dir_path = f'{plotter.OUTPUT_PATH}/{metric.name}/topology-{topology}'
-            plotter.make_output_path(dir_path)
+            dir_path = Path(plotter.OUTPUT_PATH) / metric.name / f"topology-{topology}"
 
             for workload in data.workload.unique():
-                plt.figure(figsize=(10, 5))
-                data['workload-topology'] = data.workload + " / " + data.topology
-                g = self.method(
-                    data=data[(data.workload == workload) & (data.topology == topology)],
-                    x=metric.name,
-                    y="workload-topology",
-                    hue="allocation_policy",
-                    ci=None,
-                )
-
-                xlabels = [reformat_large_tick_values(x) for x in g.get_xticks()]
-                g.set_xticklabels(xlabels)
+                subset = data[(data.workload == workload) & (data.topology == topology)]
+                figures.append(Figure(self.draw, (subset, metric.name, x_axis_label), dir_path / f"{workload}{postfix}"))
+
+        return figures
+
+    def draw(self, data, metric_name, x_axis_label):
+        plt.figure(figsize=(10, 5))
+        g = self.method(
+            data=data,
+            x=metric_name,
+            y="workload-topology",
+            hue="allocation_policy",
+            ci=None,
+        )
 
-                g.set_xlabel(x_axis_label)
-                g.set_ylabel("Workload")
-                plt.yticks(rotation=90, va="center")
-                plt.legend(title="Allocation policy", bbox_to_anchor=(1.05, 1), loc=2, borderaxespad=0.)
+        xlabels = [reformat_large_tick_values(x) for x in g.get_xticks()]
+        g.set_xticklabels(xlabels)
 
-                plt.tight_layout()
-                postfix = f"-{self.postfix_path}" if self.postfix_path else ""
-                plt.savefig(f'{dir_path}/{workload}{postfix}.svg')
+        g.set_xlabel(x_axis_label)
+        g.set_ylabel("Workload")
+        plt.yticks(rotation=90, va="center")
+        plt.legend(title="Allocation policy", bbox_to_anchor=(1.05, 1), loc=2, borderaxespad=0.)
 
 
 class MetricWorkloadBarPlot(MetricWorkloadPlot):
@@ -100,6 +122,35 @@ class MetricWorkloadViolinPlot(MetricWorkloadPlot):
         self.postfix_path = "violin"
 
 
+class TimelinePlot(Plot):
+    """The timeline of a metric of each scenario run, e.g. of `UtilizationTimelineMetric`, with the power draw."""
+
+    def figures(self, data, metric, plotter, x_axis_label):
+        figures = []
+        for scenario in metric.scenarios:
+            # Portfolios may share the topology, workload and policy of a scenario, so the IDs of the run identify it
+            portfolio_id, scenario_id, run_id = scenario_key(scenario)
+            dir_path = Path(plotter.OUTPUT_PATH) / metric.name / f"portfolio-{portfolio_id}" / \
+                f"topology-{scenario.topology}"
+            filename = f"{scenario.workload_name}-{scenario.allocation_policy}-scenario-{scenario_id}-run-{run_id}"
+            figures.append(Figure(self.draw, (metric.timeline(scenario), metric.name, x_axis_label), dir_path / filename))
+        return figures
+
+    def draw(self, timeline, metric_name, x_axis_label):
+        plt.figure(figsize=(10, 5))
+        hours = timeline.index / 60 / 60
+
+        axis = plt.gca()
+        axis.step(hours, timeline[metric_name], where="post", color="C0")
+        axis.set_xlabel("Time (hours)")
+        axis.set_ylabel(x_axis_label, color="C0")
+
+        power_axis = axis.twinx()
+        power_axis.step(hours, timeline.power_draw, where="post", color="C1")
+        power_axis.set_ylabel("Power draw (watts)", color="C1")
+        power_axis.grid(False)
+
+
 class ReportSetting1(Plot):
     def __init__(self):
         super().__init__()
@@ -107,12 +158,12 @@ class ReportSetting1(Plot):
         self.method = None
         self.row = None
 
-    def generate(self, data, metric, plotter, x_axis_label):
-        dir_path = f'{plotter.OUTPUT_PATH}/report'
-        plotter.make_output_path(dir_path)
-
-        data['workload-topology'] = data.workload + " / " + data.topology
+    def figures(self, data, metric, plotter, x_axis_label):
+        data = with_workload_topology(data)
+        path = Path(plotter.OUTPUT_PATH) / "report" / self.filename
+        return [Figure(self.draw, (data, metric.name), path, "pdf")]
 
+    def draw(self, data, metric_name):
         g = sns.FacetGrid(
             data,
             row=self.row,
@@ -121,7 +172,7 @@ class ReportSetting1(Plot):
             height=4,
             sharex=False
         )
-        g.map(self.method, metric.name, "allocation_policy", ci=None, palette="Set1")
+        g.map(self.method, metric_name, "allocation_policy", ci=None, palette="Set1")
         g.set_titles("")
         g.set_axis_labels("")
         labels = list(data['workload-topology'].unique())
@@ -130,9 +181,6 @@ class ReportSetting1(Plot):
             axis.set_xticklabels(xlabels)
             axis.set_ylabel(labels[idx])
 
-        plt.tight_layout()
-        plt.savefig(f'{dir_path}/{self.filename}.pdf')
-
 
 class ReportSetting1Makespan(ReportSetting1):
     def __init__(self):
@@ -171,13 +219,12 @@ class ReportSetting3(Plot):
         super().__init__()
         self.filename = filename
 
-    def generate(self, data, _, plotter, x_axis_labels):
-        dir_path = f'{plotter.OUTPUT_PATH}/report'
-        plotter.make_output_path(dir_path)
-
-        # get dataframes and merge them
-        data['workload-topology'] = data.workload + " / " + data.topology
+    def figures(self, data, _, plotter, x_axis_labels):
+        data = with_workload_topology(data)
+        path = Path(plotter.OUTPUT_PATH) / "report" / self.filename
+        return [Figure(self.draw, (data,), path, "pdf")]
 
+    def draw(self, data):
         g = sns.FacetGrid(
             data,
             row="metric",
@@ -202,6 +249,3 @@ class ReportSetting3(Plot):
             axis.set_xticklabels(xlabels)
             axis.set_ylabel(labels[0])
             axis.set_title(titles.get(axis.title.get_text(), "Missing label"))
-
-        plt.tight_layout()
-        plt.savefig(f'{dir_path}/{self.filename}.pdf')
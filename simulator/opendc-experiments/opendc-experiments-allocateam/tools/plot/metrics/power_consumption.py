@@ -1,25 +1,35 @@
-from .metric import Metric, metric_path
-import pandas as pd
-import numpy as np
+from .metric import Metric
+
+
+def server_power_consumption(power_df, run_duration):
+    """Returns the energy consumed by each server in watt-hours, indexed by server ID.
+
+    Each wattage sample holds until the next sample of the same server, and the last sample of a server holds until
+    the end of the run.
+    """
+    df = power_df.sort_values(["server_id", "timestamp"], kind="mergesort")
+    next_timestamp = df.groupby("server_id").timestamp.shift(-1).fillna(run_duration)
+
+    watt_hours = df.wattage * ((next_timestamp - df.timestamp) / 60 / 60)
+    return watt_hours.groupby(df.server_id).sum().rename("watt_hours")
 
 
 class PowerConsumptionMetric(Metric):
+    columns = {
+        "run-duration": ["run_duration"],
+        "power-consumption": ["timestamp", "server_id", "wattage"],
+    }
+
     def __init__(self, plot, scenarios):
         super().__init__(plot, scenarios)
         self.name = "power_consumption"
         self.x_axis_label = "Power Consumption (watt-hours)"
 
+    def get_server_data(self, scenario):
+        """Returns the energy consumed by each server of the scenario in watt-hours, for hotspot analysis."""
+        run_duration = self.load("run-duration", scenario).run_duration[0]
+        df = self.load("power-consumption", scenario)
+        return server_power_consumption(df, run_duration)
+
     def get_data(self, scenario):
-        run_duration = pd.read_parquet(metric_path("run-duration", scenario)).run_duration[0]
-        df = pd.read_parquet(metric_path("power-consumption", scenario))
-        power_consumption = []
-        for node in df.server_id.unique():
-            timestamps = df[df.server_id == node].sort_values(by='timestamp')
-            durations = np.array(list(timestamps.timestamp[1:]) + [run_duration]) - np.array(list(timestamps.timestamp))
-            timestamps['durations'] = durations / 60 / 60
-            timestamps['watt-hours'] = timestamps['wattage'] * timestamps['durations']
-            power_consumption.append(
-                timestamps['watt-hours'].sum()
-            )
-
-        yield sum(power_consumption)
+        yield self.get_server_data(scenario).sum()
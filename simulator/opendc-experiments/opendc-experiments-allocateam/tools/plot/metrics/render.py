@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple
+
+import matplotlib
+
+# Figures are only saved to files, so the non-interactive backend is used, also in the worker processes
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+import pandas as pd
+import seaborn as sns
+
+FORMATS = ["png", "svg", "pdf"]
+
+MANIFEST = "manifest.json"
+
+
+class Figure(NamedTuple):
+    """A figure to render: `draw(*args)` draws it, after which it is saved at `path` with the extension of its format.
+
+    The figure is rendered in the format of the plotting run, or in `format` if no format was chosen.
+    """
+    draw: Callable
+    args: tuple
+    path: Path
+    format: str = "svg"
+
+
+def set_style():
+    sns.set(
+        style="darkgrid",
+        font_scale=1.6
+    )
+
+
+def figure_path(figure: Figure, file_format: Optional[str] = None) -> Path:
+    return Path(f"{figure.path}.{file_format or figure.format}")
+
+
+def figure_hash(figure: Figure, file_format: Optional[str] = None) -> str:
+    """Return a hash of everything a figure is rendered from: the plot drawing it, its data and its file format."""
+    plot = getattr(figure.draw, "__self__", None)
+    digest = hashlib.sha256()
+    digest.update(repr([
+        type(plot).__qualname__,
+        figure.draw.__qualname__,
+        getattr(plot, "version", None),
+        file_format or figure.format,
+    ]).encode())
+
+    for arg in figure.args:
+        if isinstance(arg, pd.DataFrame):
+            # The index is hashed too, as it positions the data of e.g. the timeline plots
+            digest.update(repr([(str(column), str(dtype)) for column, dtype in arg.dtypes.items()]).encode())
+            digest.update(repr(list(arg.index.names)).encode())
+            digest.update(pd.util.hash_pandas_object(arg, index=True).to_numpy().tobytes())
+        else:
+            digest.update(repr(arg).encode())
+
+    return digest.hexdigest()
+
+
+class Manifest:
+    """The hashes of the inputs of the figures in an output dir, keyed by their path relative to the output dir.
+
+    The manifest is stored in the output dir, so that a later plotting run can reuse the figures whose inputs did not
+    change instead of rendering them again.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.path = self.root / MANIFEST
+        self.hashes = json.loads(self.path.read_text()) if self.path.exists() else {}
+
+    @classmethod
+    def previous(cls, root: Path) -> Optional["Manifest"]:
+        """Return the manifest of the latest output dir before the given one, or None if there is none.
+
+        Output dirs are named by the time of their plotting run, so they are ordered by name.
+        """
+        root = Path(root)
+        candidates = sorted(path.parent for path in root.parent.glob(f"*/{MANIFEST}") if path.parent.name < root.name)
+        return cls(candidates[-1]) if candidates else None
+
+    def reuse(self, key: str, digest: str, path: Path) -> bool:
+        """Link the figure at the key into the given path if it was rendered from the same inputs."""
+        source = self.root / key
+        if self.hashes.get(key) != digest or not source.exists():
+            return False
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists():
+            path.unlink()
+        try:
+            os.link(source, path)
+        except OSError:
+            # E.g. the output dirs are on a file system without hard links
+            shutil.copy2(source, path)
+        return True
+
+    def save(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(self.hashes, indent=2, sort_keys=True))
+        temporary.replace(self.path)
+
+
+def render_figure(figure: Figure, file_format: Optional[str] = None) -> Tuple[Path, float]:
+    """Render a figure and close it, returning the path of the file and the seconds it took."""
+    start = time.perf_counter()
+    path = figure_path(figure, file_format)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    try:
+        figure.draw(*figure.args)
+        plt.tight_layout()
+        plt.savefig(path)
+    finally:
+        # Close the figures drawn, so that memory does not grow with every figure rendered
+        plt.close("all")
+
+    return path, time.perf_counter() - start
+
+
+def render(figures: List[Figure], file_format: Optional[str] = None, jobs: int = 1) -> Iterator[Tuple[Path, float]]:
+    """Render the figures, in parallel if more than one job is used, yielding the path and render time of each."""
+    if jobs <= 1:
+        for figure in figures:
+            yield render_figure(figure, file_format)
+        return
+
+    with ProcessPoolExecutor(jobs, initializer=set_style) as executor:
+        yield from executor.map(render_figure, figures, repeat(file_format))
@@ -0,0 +1,46 @@
+from typing import Dict, List
+
+import pandas as pd
+
+
+def scenario_key(scenario):
+    """Return the key identifying the run of a scenario."""
+    return scenario.portfolio_id, scenario.scenario_id, scenario.run_id
+
+
+class ScenarioTable:
+    """The runs of the scenarios of an experiment, which can be iterated any number of times.
+
+    The runs are ordered by portfolio and then by scenario, both in order of first appearance in the experiments
+    table, and are indexed by (portfolio_id, scenario_id, run_id).
+    """
+
+    def __init__(self, experiments: pd.DataFrame):
+        # The groups are sorted by the order of first appearance of their portfolio and scenario, and keep the order of
+        # their runs
+        portfolio_order = pd.factorize(experiments.portfolio_id)[0]
+        scenario_order = pd.factorize(experiments.scenario_id)[0]
+        scenarios = experiments.groupby([portfolio_order, scenario_order], sort=True)
+
+        table = pd.concat([runs for _, runs in scenarios]) if len(experiments) else experiments
+        self.table = table.set_index(["portfolio_id", "scenario_id", "run_id"], drop=False)
+
+        # The runs are series rather than named tuples, so that they can be passed to worker processes
+        self.runs = [run for _, runs in scenarios for _, run in runs.iterrows()]
+
+    def __iter__(self):
+        return iter(self.runs)
+
+    def __len__(self):
+        return len(self.runs)
+
+    def get(self, portfolio_id, scenario_id, run_id) -> pd.Series:
+        """Return the run with the given IDs."""
+        return self.table.loc[(portfolio_id, scenario_id, run_id)]
+
+    def by_run_id(self) -> Dict[int, List[pd.Series]]:
+        """Return the runs of the scenarios grouped by run ID."""
+        runs: dict = {}
+        for run in self.runs:
+            runs.setdefault(run.run_id, []).append(run)
+        return runs
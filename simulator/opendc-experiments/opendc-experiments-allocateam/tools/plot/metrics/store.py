@@ -0,0 +1,119 @@
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .data import DATA_LOADER
+
+
+def run_partition(scenario) -> str:
+    return "portfolio_id={}/scenario_id={}/run_id={}".format(
+        scenario.portfolio_id, scenario.scenario_id, scenario.run_id
+    )
+
+
+class MetricStore:
+    """Precomputed values of the metrics per scenario run, stored next to the telemetry they were computed from.
+
+    The values of a metric are stored at `metrics/<name>/portfolio_id=…/scenario_id=…/run_id=…/data.parquet` in the
+    data dir, together with a hash of the contents of the input tables and other input files of the run and of the
+    definition of the metric. Values whose inputs have changed since they were computed are not loaded, so that they
+    are recomputed.
+
+    Values are only written to the data dir when the store is writable, e.g. by `compute.py`.
+    """
+
+    def __init__(self, loader=DATA_LOADER):
+        self.loader = loader
+        # Whether stored values are loaded, and whether computed values are stored
+        self.enabled = False
+        self.writable = False
+
+        self.hits = 0
+        self.misses = 0
+
+        # Hashes of the input files, keyed by their path, size and modification time
+        self._file_hashes = {}
+
+    @property
+    def root(self) -> Path:
+        return self.loader.root / "metrics"
+
+    def path(self, metric, scenario) -> Path:
+        return self.root / metric.name / run_partition(scenario) / "data.parquet"
+
+    def input_hash(self, metric, scenario) -> str:
+        """Return the hash of the inputs of the metric for the scenario run."""
+        definition = [type(metric).__name__, metric.version, metric.columns]
+        if metric.parameters:
+            definition.append(metric.parameter_values())
+
+        digest = hashlib.sha256()
+        digest.update(json.dumps(definition, sort_keys=True).encode())
+
+        for name in sorted(metric.columns):
+            directory = self.loader.root / name / run_partition(scenario)
+            for file in sorted(directory.glob("*.parquet")):
+                digest.update(file.name.encode())
+                digest.update(self._file_hash(file))
+
+        for file in metric.input_files(scenario):
+            digest.update(Path(file).name.encode())
+            digest.update(self._file_hash(Path(file)))
+
+        return digest.hexdigest()
+
+    def _file_hash(self, file: Path) -> bytes:
+        stat = file.stat()
+        key = (str(file), stat.st_size, stat.st_mtime_ns)
+
+        if key not in self._file_hashes:
+            digest = hashlib.sha256()
+            with open(file, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 ** 2), b""):
+                    digest.update(chunk)
+            self._file_hashes[key] = digest.digest()
+
+        return self._file_hashes[key]
+
+    def is_current(self, metric, scenario, input_hash=None) -> bool:
+        """Return whether the stored values of the metric for the scenario were computed from the current inputs."""
+        path = self.path(metric, scenario)
+        if not path.exists():
+            return False
+
+        metadata = pq.read_schema(path).metadata or {}
+        stored_hash = metadata.get(b"input_hash", b"").decode()
+        return stored_hash == (input_hash or self.input_hash(metric, scenario))
+
+    def load(self, metric, scenario):
+        """Return the stored values of the metric for the scenario, or None if they are missing or outdated."""
+        if not self.is_current(metric, scenario):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return pq.read_table(self.path(metric, scenario)).column("value").to_numpy()
+
+    def save(self, metric, scenario, values, input_hash=None):
+        """Store the values of the metric for the scenario."""
+        table = pa.table({"value": np.asarray(values)})
+        table = table.replace_schema_metadata({"input_hash": input_hash or self.input_hash(metric, scenario)})
+
+        path = self.path(metric, scenario)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temporary file first, so that a concurrent reader never sees a partially written file
+        temporary = path.with_suffix(".tmp")
+        pq.write_table(table, temporary)
+        temporary.replace(path)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+# Store of the data dir of the current run of the script, used by the metrics when enabled
+METRIC_STORE = MetricStore()
@@ -1,14 +1,22 @@
-from .metric import Metric, metric_path
 import pandas as pd
 
+from .metric import Metric
+
 
 class TaskThroughputMetric(Metric):
+    columns = {"task-lifecycle": ["finish_time"]}
+
     def __init__(self, plot, scenarios):
         super().__init__(plot, scenarios)
         self.name = "task_throughput"
         self.x_axis_label = "Task throughput (tasks per hour)"
 
     def get_data(self, scenario):
-        task_df = pd.read_parquet(metric_path("task-lifecycle", scenario))
-        run_duration = task_df.finish_time.max()
-        yield len(task_df) / ((run_duration // 1000) / 60 / 60)
+        tasks = 0
+        last_finish_times = []
+        for batch in self.load_batches("task-lifecycle", scenario):
+            tasks += len(batch)
+            last_finish_times.append(batch.finish_time.max())
+
+        run_duration = pd.Series(last_finish_times, dtype=float).max()
+        yield tasks / ((run_duration // 1000) / 60 / 60)
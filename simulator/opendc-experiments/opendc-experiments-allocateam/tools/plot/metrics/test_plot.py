@@ -0,0 +1,29 @@
+from types import SimpleNamespace
+
+import pandas as pd
+
+from .plot import TimelinePlot
+
+
+def _scenario(portfolio_id, scenario_id):
+    return pd.Series({
+        "portfolio_id": portfolio_id,
+        "scenario_id": scenario_id,
+        "run_id": 0,
+        "topology": "medium",
+        "workload_name": "spec_trace-2",
+        "allocation_policy": "random",
+    })
+
+
+def test_timeline_figures_of_equal_scenarios_have_distinct_paths(tmp_path):
+    metric = SimpleNamespace(
+        name="busy_servers",
+        scenarios=[_scenario(0, 0), _scenario(1, 4)],
+        timeline=lambda scenario: pd.DataFrame({"busy_servers": [0.0]}),
+    )
+    plotter = SimpleNamespace(OUTPUT_PATH=str(tmp_path))
+
+    figures = TimelinePlot().figures(None, metric, plotter, "Busy servers")
+
+    assert len({figure.path for figure in figures}) == 2
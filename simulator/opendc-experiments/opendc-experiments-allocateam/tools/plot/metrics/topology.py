@@ -0,0 +1,32 @@
+import json
+from pathlib import Path
+
+TOPOLOGY_PATH = (Path(__file__).parent / "../../../src/main/resources/env").resolve()
+
+
+class TopologyRegistry:
+    """The machine counts of the topologies of the experiment, read from their definitions in the resources.
+
+    The topology of a scenario is defined in `<name>.json` (e.g. `medium.json`), which is read once per topology.
+    """
+
+    def __init__(self, root: Path = TOPOLOGY_PATH):
+        self.root = Path(root)
+        self.sizes = {}
+
+    def path(self, name: str) -> Path:
+        """Return the path of the definition of the topology with the given name."""
+        return self.root / f"{name}.json"
+
+    def machines(self, name: str) -> int:
+        """Return the number of machines of the topology with the given name."""
+        if name not in self.sizes:
+            path = self.path(name)
+            if not path.exists():
+                raise KeyError(f"Unknown topology {name!r}: {path} does not exist")
+            self.sizes[name] = int(json.loads(path.read_text())["totalMachines"])
+        return self.sizes[name]
+
+
+# Registry shared by all metrics
+TOPOLOGIES = TopologyRegistry()
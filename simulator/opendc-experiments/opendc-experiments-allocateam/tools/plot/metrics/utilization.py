@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+
+from .data import DATA_LOADER
+from .metric import Metric
+from .power_consumption import PowerConsumptionMetric
+
+
+def bucket_edges(run_duration, bucket_width) -> np.ndarray:
+    """Returns the edges of the buckets of the given width covering a run, the last of which may be shorter."""
+    return np.append(np.arange(0, run_duration, bucket_width, dtype=np.float64), float(run_duration))
+
+
+def bucket_averages(times, deltas, edges) -> np.ndarray:
+    """Returns the time-weighted average per bucket of a step function that starts at zero and changes by the deltas at
+    the times.
+
+    The changes are sorted and summed into the levels of the step function, whose area up to each edge is then
+    interpolated from the cumulative area at each change, so the cost is O(n log n) in the number of changes.
+    """
+    order = np.argsort(times, kind="mergesort")
+    times = np.asarray(times, dtype=np.float64)[order]
+    levels = np.cumsum(np.asarray(deltas, dtype=np.float64)[order])
+
+    # The area under the step function up to each change, and up to each edge
+    areas = np.concatenate([[0.0], np.cumsum(levels[:-1] * np.diff(times))]) if len(times) else times
+    changes = np.searchsorted(times, edges, side="right") - 1
+    before = changes < 0
+    changes[before] = 0
+
+    edge_areas = np.where(before, 0.0, areas[changes] + levels[changes] * (edges - times[changes])) \
+        if len(times) else np.zeros(len(edges))
+    return np.diff(edge_areas) / np.diff(edges)
+
+
+def busy_servers(task_df, edges) -> np.ndarray:
+    """Returns the average number of servers running at least one task in each bucket.
+
+    Times are in milliseconds in the task lifecycle table and in seconds in the edges. Tasks that never started are
+    ignored, and tasks that did not finish run until the end of the last bucket.
+    """
+    tasks = task_df[task_df.start_time.notna()]
+    starts = tasks.start_time.to_numpy(dtype=np.float64) / 1000
+    finishes = np.nan_to_num(tasks.finish_time.to_numpy(dtype=np.float64) / 1000, nan=edges[-1])
+    servers = pd.factorize(tasks.server_id)[0]
+
+    # Sweep over the starts and finishes of the tasks per server. The tasks of each server add up to zero, so the
+    # running sum is the number of tasks running on the server of each event
+    times = np.concatenate([starts, finishes])
+    deltas = np.concatenate([np.ones(len(starts)), -np.ones(len(finishes))])
+    server_ids = np.concatenate([servers, servers])
+    order = np.lexsort((deltas, times, server_ids))
+    running = np.cumsum(deltas[order]) > 0
+
+    # A server becomes busy when its first task starts, and idle when its last running task finishes
+    changes = running.astype(np.int64) - np.concatenate([[False], running[:-1]]).astype(np.int64)
+    changed = changes != 0
+    return bucket_averages(times[order][changed], changes[changed], edges)
+
+
+def power_draw(power_df, edges) -> np.ndarray:
+    """Returns the average total power draw in watts of the servers in each bucket.
+
+    Each wattage sample holds until the next sample of the same server, as in `server_power_consumption`.
+    """
+    df = power_df.sort_values(["server_id", "timestamp"], kind="mergesort")
+    previous_wattage = df.groupby("server_id").wattage.shift(1).fillna(0)
+    return bucket_averages(df.timestamp.to_numpy(), (df.wattage - previous_wattage).to_numpy(), edges)
+
+
+class UtilizationTimelineMetric(Metric):
+    columns = {
+        "run-duration": ["run_duration"],
+        "task-lifecycle": ["server_id", "start_time", "finish_time"],
+    }
+    parameters = ("bucket_width",)
+    ordered = True
+
+    # The width of the buckets of the timeline in seconds
+    bucket_width = 60 * 60
+
+    def __init__(self, plot, scenarios):
+        super().__init__(plot, scenarios)
+        self.name = "busy_servers"
+        self.x_axis_label = "Busy servers"
+
+    def edges(self, scenario) -> np.ndarray:
+        run_duration = self.load("run-duration", scenario).run_duration[0]
+        return bucket_edges(run_duration, self.bucket_width)
+
+    def timeline(self, scenario) -> pd.DataFrame:
+        """Return the average number of busy servers and total power draw in each bucket of the scenario.
+
+        The buckets are indexed by their start time in seconds.
+        """
+        power_df = DATA_LOADER.load("power-consumption", scenario, PowerConsumptionMetric.columns["power-consumption"])
+        edges = self.edges(scenario)
+        return pd.DataFrame({
+            "busy_servers": np.asarray(self.values(scenario)),
+            "power_draw": power_draw(power_df, edges),
+        }, index=pd.Index(edges[:-1], name="time"))
+
+    def get_data(self, scenario):
+        # The sweep needs the tasks of each server in order, so the table is loaded at once instead of in batches
+        task_df = self.load("task-lifecycle", scenario)
+        return busy_servers(task_df, self.edges(scenario))
@@ -6,36 +6,37 @@ from pathlib import Path
 from typing import List, Dict, Type
 
 import pandas as pd
-import seaborn as sns
 
-from metrics import Metric, Plot
+from metrics import Metric, Plot, ScenarioTable
 from metrics.plot import MetricWorkloadBarPlot as bar_plot
 from metrics.plot import MetricWorkloadViolinPlot as violin_plot
+from metrics.plot import TimelinePlot as timeline_plot
 from metrics.plot import ReportSetting1Makespan, ReportSetting1WaitingTime
 from metrics.plot import ReportSetting2Makespan, ReportSetting2WaitingTime
 from metrics.plot import ReportSetting3
+from metrics.compute import compute
+from metrics.data import BASE_DATA_PATH, DATA_LOADER
+from metrics.render import FORMATS, Figure, Manifest, figure_hash, figure_path, render, set_style
+from metrics.store import METRIC_STORE
 import metrics
 
 
-def iter_runs(experiments):
-    for portfolio_id in experiments['portfolio_id'].unique():
-        for scenario_id in experiments['scenario_id'].unique():
-            p_id = experiments['portfolio_id'] == portfolio_id
-            s_id = experiments['scenario_id'] == scenario_id
-            for _, run in experiments[p_id & s_id].iterrows():
-                yield run
-
-
 class Plotter:
     OUTPUT_PATH = f"{Path(__file__).parent.resolve()}/results/{datetime.now():%Y-%m-%d-%H-%M-%S}"
 
     def __init__(self,
                  plot_classes: Dict[Type[Metric], List[Type[Plot]]],
                  path: Path,
-                 scenario_filter=None):
+                 scenario_filter=None,
+                 jobs: int = 1,
+                 file_format: str = None,
+                 incremental: bool = True):
         self.metric_classes = list(plot_classes.keys())
         self.plot_classes = plot_classes
         self.path = path
+        self.jobs = jobs
+        self.file_format = file_format
+        self.incremental = incremental
 
         self.metrics = self._preprocess(path, scenario_filter)
         self.make_output_path()
@@ -49,15 +50,61 @@ class Plotter:
         experiments = pd.read_parquet(path / "experiments.parquet")
         if scenario_filter is not None:
             experiments = experiments[scenario_filter(experiments)]
+        self.scenarios = ScenarioTable(experiments)
         return [
-            metric(self.plot_classes[metric], iter_runs(experiments))
+            metric(self.plot_classes[metric], self.scenarios)
             for metric in self.metric_classes
         ]
 
+    def compute_metrics(self):
+        """Compute the dataframes of all metrics, in parallel over the scenarios if more than one job is used.
+
+        The dataframes are built in the order of the scenarios, so the result is the same as when computed serially.
+        """
+        pending = [metric for metric in self.metrics if metric.df_cache is None]
+        compute(pending, self.scenarios, self.jobs)
+
+        for metric in pending:
+            metric.df_cache = metric.metric_dataframe()
+
+    def render(self, figures: List[Figure]):
+        """Render the figures, in parallel if more than one job is used, and report the render time of each.
+
+        The hashes of the inputs of the figures are recorded in the manifest of the output dir. When plotting
+        incrementally, the figures whose inputs are the same as in the previous output dir are hard-linked from there
+        instead of being rendered again.
+        """
+        output_path = Path(self.OUTPUT_PATH)
+        manifest = Manifest(output_path)
+        previous = Manifest.previous(output_path) if self.incremental else None
+
+        pending = []
+        for figure in figures:
+            path = figure_path(figure, self.file_format)
+            key = path.relative_to(output_path).as_posix()
+            digest = figure_hash(figure, self.file_format)
+            manifest.hashes[key] = digest
+
+            if previous is None or not previous.reuse(key, digest, path):
+                pending.append(figure)
+
+        total = 0
+        for path, seconds in render(pending, self.file_format, self.jobs):
+            print(f"  {path.relative_to(output_path)} ({seconds:.2f} s)")
+            total += seconds
+        manifest.save()
+
+        print(f"{len(pending)} figure(s) rendered in {total:.2f} s")
+        if previous is not None:
+            print(f"{len(figures) - len(pending)} unchanged figure(s) linked from {previous.root}")
+
     def plot_all(self):
+        self.compute_metrics()
+
         print("Plotting..")
+        # The figures of all metrics are rendered together, so that they are spread over the worker processes
+        self.render([figure for metric in self.metrics for figure in metric.figures(self)])
         for metric in self.metrics:
-            metric.generate_plot(self)
             print(f"✅ {metric.name}")
 
         print(f"Plots successfully stored in {self.OUTPUT_PATH}")
@@ -71,7 +118,7 @@ def generate_report_plots(args):
 
     scenario_filter = lambda df: df.workload_name == "spec_trace-2"
 
-    plotter = Plotter(report_plots, args.path, scenario_filter)
+    plotter = Plotter(report_plots, args.path, scenario_filter, args.jobs, args.format, not args.rerender)
     plotter.plot_all()
 
     # Setting 2
@@ -83,7 +130,7 @@ def generate_report_plots(args):
 
     scenario_filter = lambda df: df.topology == "medium"
 
-    plotter = Plotter(report_plots, args.path, scenario_filter)
+    plotter = Plotter(report_plots, args.path, scenario_filter, args.jobs, args.format, not args.rerender)
     plotter.plot_all()
 
     # Setting 3
@@ -97,10 +144,11 @@ def generate_report_plots(args):
 
     for multi_metrics, filename in groups:
         report_plots = {m: [] for m in multi_metrics}
-        plotter = Plotter(report_plots, args.path, scenario_filter)
+        plotter = Plotter(report_plots, args.path, scenario_filter, args.jobs, args.format, not args.rerender)
+        plotter.compute_metrics()
         dfs = []
         for metric in plotter.metrics:
-            df = metric.metric_dataframe()
+            df = metric.df_cache.copy()
             df.rename(columns={metric.name: "value"}, inplace=True)
             df['metric'] = metric.name
             dfs.append(df)
@@ -119,15 +167,65 @@ def main():
         "path",
         nargs='?',
         type=str,
-        help="The path to the input csv file.",
-        default=metrics.metric.BASE_DATA_PATH,
+        help="The path to the data dir.",
+        default=BASE_DATA_PATH,
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=1024,
+        help="The memory budget in MiB of the telemetry tables shared between metrics.",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=None,
+        help="Stream the task lifecycle tables in batches of this many rows instead of loading them at once, to "
+        "bound the memory used by tables larger than memory.",
+    )
+    parser.add_argument(
+        "--bucket-width",
+        type=int,
+        default=metrics.UtilizationTimelineMetric.bucket_width,
+        help="The width in seconds of the buckets of the utilization timeline.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="The number of worker processes computing the metrics and rendering the plots.",
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default=None,
+        help="The file format of the plots (default: svg for the plots per workload and pdf for the report plots).",
+    )
+    parser.add_argument(
+        "--rerender",
+        action="store_true",
+        help="Render all plots, instead of linking the plots whose data did not change from the previous output dir.",
+    )
+    parser.add_argument(
+        "--store",
+        action="store_true",
+        help="Store the metrics computed from the telemetry in the metric store of the data dir.",
+    )
+    parser.add_argument(
+        "--no-store",
+        action="store_true",
+        help="Compute all metrics from the telemetry, without reading or writing the metric store.",
     )
     args = parser.parse_args()
+    args.path = Path(args.path)
+    DATA_LOADER.root = args.path
+    DATA_LOADER.max_bytes = args.cache_size * 1024 ** 2
+    DATA_LOADER.batch_size = args.batch_size
+    metrics.UtilizationTimelineMetric.bucket_width = args.bucket_width
+    METRIC_STORE.enabled = not args.no_store
+    METRIC_STORE.writable = args.store and not args.no_store
 
-    sns.set(
-        style="darkgrid",
-        font_scale=1.6
-    )
+    set_style()
 
     if report_plots:
         generate_report_plots(args)
@@ -139,10 +237,20 @@ def main():
             metrics.IdleTimeMetric: [bar_plot],
             metrics.JobWaitingTimeMetric: [bar_plot, violin_plot],
             metrics.JobMakespanMetric: [bar_plot, violin_plot],
+            metrics.UtilizationTimelineMetric: [timeline_plot],
         }
-        plotter = Plotter(all_plots, args.path)
+        plotter = Plotter(all_plots, args.path, jobs=args.jobs, file_format=args.format,
+                          incremental=not args.rerender)
         plotter.plot_all()
 
+    stats = DATA_LOADER.stats()
+    print(f"Data loader: {stats['hits']} hits, {stats['misses']} misses, "
+          f"{stats['bytes_decoded'] / 1024 ** 2:.1f} MiB decoded")
+    # The metric store of worker processes keeps its own statistics
+    if METRIC_STORE.enabled and args.jobs <= 1:
+        stats = METRIC_STORE.stats()
+        print(f"Metric store: {stats['hits']} up to date, {stats['misses']} computed")
+
 
 if __name__ == "__main__":
     main()
@@ -1,63 +1,130 @@
 """This module aims to verify the repeatability of the Allocateam experiment,
 by first running the experiment three times in setting 3 (medium topology, spec_trace 2, all metrics).
-We then assert that the metrics produced by the three runs are equivalent.
+We then verify that the metrics produced by the runs are equal, optionally within a numeric tolerance.
 """
 
 import argparse
+import hashlib
+import sys
 from pathlib import Path
-from typing import List, Type, Dict
+from typing import List, Optional
 
 import metrics
+import numpy as np
 import pandas as pd
-from metrics import Metric
-import plot
+from metrics import Metric, ScenarioTable
+from metrics.compute import compute
+from metrics.data import BASE_DATA_PATH, DATA_LOADER
+from metrics.store import METRIC_STORE
 
 
-def collect_metrics_per_run(data_path: Path, metric_classes: List[Type[Metric]]) -> Dict[int, List[pd.DataFrame]]:
-    """Collect metrics per run.
+def canonical(values, ordered: bool = False) -> np.ndarray:
+    """Return the values of a metric as float64, sorted unless their order is part of the metric."""
+    values = np.asarray(values, dtype=np.float64)
+    return values if ordered else np.sort(values)
+
+
+def canonical_hash(values, ordered: bool = False) -> str:
+    """Return a hash of the values of a metric that does not depend on their order, unless the order is significant.
 
     Args:
-        data_path (Path): Path to the metrics.
-        metric_classes (List[Type[Metric]]): List of metrics to collect.
+        values (array_like): The values of a metric for a scenario run.
+        ordered (bool): Whether the order of the values is part of the metric, e.g. the buckets of a timeline.
 
     Returns:
-        Dict[int, List[pd.DataFrame]]: Key is run id. Value is list of metrics per scenario.
+        str: The hex digest of the values as float64, sorted unless ordered, with negative zeros replaced by zeros.
     """
-    experiments = pd.read_parquet(f"{data_path}/experiments.parquet")
+    canonical_values = canonical(values, ordered) + 0.0
+    return hashlib.sha256(canonical_values.tobytes()).hexdigest()
 
-    scenarios_per_run: dict = {}
-    for scenario in plot.iter_runs(experiments):
-        if not scenarios_per_run.get(scenario.run_id):
-            scenarios_per_run[scenario.run_id] = []
-        scenarios_per_run[scenario.run_id].append(scenario)
 
-    metrics_per_run: dict = {}
-    for run_id, scenarios in scenarios_per_run.items():
-        for metric in metric_classes:
-            df = metric([], scenarios).metric_dataframe()
-            if not metrics_per_run.get(run_id):
-                metrics_per_run[run_id] = []
-            metrics_per_run[run_id].append(df)
+def collect_hashes(scenarios: ScenarioTable, metric_list: List[Metric]) -> pd.DataFrame:
+    """Collect the hash of the values of each metric for each scenario run.
 
-    return metrics_per_run
+    Args:
+        scenarios (ScenarioTable): The scenario runs.
+        metric_list (List[Metric]): The metrics to collect, whose values have been computed.
+
+    Returns:
+        pd.DataFrame: The metric name, portfolio, scenario and run ID and the hash of the values, one row per metric
+        per scenario run.
+    """
+    rows = [
+        (metric.name, scenario.portfolio_id, scenario.scenario_id, scenario.run_id,
+         canonical_hash(metric.values(scenario), metric.ordered))
+        for metric in metric_list
+        for scenario in scenarios
+    ]
+    return pd.DataFrame(rows, columns=["metric", "portfolio_id", "scenario_id", "run_id", "hash"])
 
 
-def assert_equality(metrics_per_run: Dict[int, List[pd.DataFrame]]):
-    """Assert that the metrics for each run are the same.
+def diff(expected, actual, rtol: float = 0, atol: float = 0, ordered: bool = False) -> Optional[str]:
+    """Compare the values of a metric of two runs, sorted unless their order is significant.
 
     Args:
-        metrics_per_run (Dict[int, List[pd.DataFrame]]): The metrics per run.
+        expected (array_like): The values of the reference run.
+        actual (array_like): The values of the compared run.
+        rtol (float): The relative tolerance of the values.
+        atol (float): The absolute tolerance of the values.
+        ordered (bool): Whether the order of the values is part of the metric, e.g. the buckets of a timeline.
+
+    Returns:
+        Optional[str]: A description of the differences, or None if the values are equal within the tolerance.
     """
-    print("Verifying that each run returns equal results.")
-    for run_id_a, run_metrics_a in metrics_per_run.items():
-        for run_id_b, run_metrics_b in metrics_per_run.items():
-            if run_id_a == run_id_b:
-                continue
-            for i in range(len(run_metrics_a)):
-                print(f"Asserting equality for run {run_id_a} and run {run_id_b}")
-                print(f"For the metric: {run_metrics_a[i].columns[-1]}")
-                assert list(run_metrics_a[i]) == list(run_metrics_b[i])
-    print("All runs are equal!")
+    expected = canonical(expected, ordered)
+    actual = canonical(actual, ordered)
+
+    if expected.shape != actual.shape:
+        return f"{len(actual)} values instead of {len(expected)}"
+
+    close = np.isclose(actual, expected, rtol=rtol, atol=atol, equal_nan=True)
+    if close.all():
+        return None
+
+    max_difference = np.nanmax(np.abs(actual[~close] - expected[~close]))
+    return f"{(~close).sum()} of {len(actual)} values differ, by at most {max_difference:g}"
+
+
+def verify(hashes: pd.DataFrame, metric_list: List[Metric], scenarios: ScenarioTable,
+           rtol: float = 0, atol: float = 0) -> List[str]:
+    """Verify that all runs of each scenario produce the same values for each metric.
+
+    The runs of a scenario are grouped by the hash of their values, so runs with identical values are compared once.
+    When the runs of a scenario do not all have the same hash, the values of the most common hash are compared with
+    the values of each other hash under the tolerance.
+
+    Args:
+        hashes (pd.DataFrame): The hashes of the values, see `collect_hashes`.
+        metric_list (List[Metric]): The metrics the hashes were collected for.
+        scenarios (ScenarioTable): The scenario runs.
+        rtol (float): The relative tolerance of the values.
+        atol (float): The absolute tolerance of the values.
+
+    Returns:
+        List[str]: A description of each run whose values differ from the other runs of its scenario.
+    """
+    metrics_by_name = {metric.name: metric for metric in metric_list}
+    keys = ["metric", "portfolio_id", "scenario_id"]
+
+    distinct = hashes.groupby(keys).hash.transform("nunique")
+    divergent = hashes[distinct > 1]
+
+    failures = []
+    for (name, portfolio_id, scenario_id), runs in divergent.groupby(keys, sort=False):
+        metric = metrics_by_name[name]
+        groups = runs.groupby("hash", sort=False).run_id.apply(list)
+        groups = groups.loc[groups.map(len).sort_values(ascending=False, kind="mergesort").index]
+
+        reference_runs = groups.iloc[0]
+        expected = metric.values(scenarios.get(portfolio_id, scenario_id, reference_runs[0]))
+        for run_ids in groups.iloc[1:]:
+            actual = metric.values(scenarios.get(portfolio_id, scenario_id, run_ids[0]))
+            difference = diff(expected, actual, rtol, atol, metric.ordered)
+            if difference is not None:
+                failures.append(f"{name} of portfolio {portfolio_id}, scenario {scenario_id}: run(s) {run_ids} "
+                                f"differ from run(s) {reference_runs}: {difference}")
+
+    return failures
 
 
 def main():
@@ -67,9 +134,35 @@ def main():
         nargs='?',
         type=str,
         help="The path to data dir.",
-        default=metrics.metric.BASE_DATA_PATH,
+        default=BASE_DATA_PATH,
+    )
+    parser.add_argument(
+        "--rtol",
+        type=float,
+        default=0,
+        help="The relative tolerance of the values of the metrics.",
+    )
+    parser.add_argument(
+        "--atol",
+        type=float,
+        default=0,
+        help="The absolute tolerance of the values of the metrics.",
+    )
+    parser.add_argument(
+        "--store",
+        action="store_true",
+        help="Store the metrics computed from the telemetry in the metric store of the data dir.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="The number of worker processes computing the metrics.",
     )
     args = parser.parse_args()
+    DATA_LOADER.root = Path(args.path)
+    METRIC_STORE.enabled = True
+    METRIC_STORE.writable = args.store
 
     all_metrics = [
         metrics.JobTurnaroundTimeMetric,
@@ -78,10 +171,24 @@ def main():
         metrics.IdleTimeMetric,
         metrics.JobWaitingTimeMetric,
         metrics.JobMakespanMetric,
+        metrics.UtilizationTimelineMetric,
     ]
 
-    metrics_per_run = collect_metrics_per_run(args.path, all_metrics)
-    assert_equality(metrics_per_run)
+    scenarios = ScenarioTable(pd.read_parquet(DATA_LOADER.root / "experiments.parquet"))
+    metric_list = [metric([], scenarios) for metric in all_metrics]
+    compute(metric_list, scenarios, args.jobs)
+
+    print("Verifying that each run returns equal results.")
+    hashes = collect_hashes(scenarios, metric_list)
+    failures = verify(hashes, metric_list, scenarios, args.rtol, args.atol)
+
+    for failure in failures:
+        print(failure)
+    if failures:
+        sys.exit(1)
+
+    runs = hashes.run_id.nunique()
+    print(f"All {runs} runs are equal!")
 
 
 if __name__ == "__main__":